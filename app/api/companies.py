@@ -80,8 +80,14 @@ async def lookup_company_cif(company_id: int, request: Request, db: AsyncSession
     if error:
         return error
 
-    from app.services.cif_enrichment import enrich_company_cif
-    cif = await enrich_company_cif(company_id, db)
+    from app.services.cif_enrichment import SourceUnavailable, enrich_company_cif
+    try:
+        cif = await enrich_company_cif(company_id, db)
+    except SourceUnavailable:
+        return JSONResponse(
+            {"cif": None, "error": "Fuentes de CIF no disponibles, reintenta mas tarde"},
+            status_code=503,
+        )
     if cif:
         return {"cif": cif}
     return {"cif": None, "error": "CIF no encontrado"}
@@ -30,6 +30,7 @@ async def search(
     sort_order: str = "desc",
     page: int = 1,
     per_page: int = 25,
+    cursor: str | None = None,
     db: AsyncSession = Depends(get_db),
 ):
     filters = SearchFilters(
@@ -50,6 +51,7 @@ async def search(
         sort_order=sort_order,
         page=page,
         per_page=per_page,
+        cursor=cursor,
     )
     result = await search_companies(filters, db)
     return PaginatedResponse(
@@ -58,4 +60,5 @@ async def search(
         page=result["page"],
         pages=result["pages"],
         per_page=result["per_page"],
+        next_cursor=result.get("next_cursor"),
     )
@@ -20,6 +20,7 @@ from app.schemas.solvency import (
     SolvencyBatchResponse,
     SolvencyResponse,
 )
+from app.services.company_service import companies_changed
 from app.services.scoring_service import compute_score_detailed
 
 router = APIRouter()
@@ -61,6 +62,7 @@ async def _build_solvency(company: Company, db: AsyncSession) -> SolvencyRespons
     company.score_solvencia = result["score"]
     company.score_updated_at = datetime.utcnow()
     await db.commit()
+    await companies_changed(db, [company.id])
 
     return SolvencyResponse(
         cif=company.cif or "",
@@ -1,8 +1,8 @@
-"""Auto-migration: detect and add missing columns on startup.
+"""Auto-migration: detect and add missing columns and indexes on startup.
 
 SQLAlchemy's create_all() only creates new tables—it won't ALTER existing
 ones.  This module compares the ORM model definitions with the live DB
-schema and issues ALTER TABLE … ADD COLUMN for any gaps.
+schema and issues ALTER TABLE … ADD COLUMN and CREATE INDEX for any gaps.
 """
 
 import logging
@@ -20,11 +20,11 @@ async def auto_migrate(engine) -> None:
     async with engine.connect() as conn:
         def _inspect(sync_conn):
             insp = sa_inspect(sync_conn)
-            return {
-                tbl: {c["name"] for c in insp.get_columns(tbl)}
-                for tbl in insp.get_table_names()
-            }
-        db_schema = await conn.run_sync(_inspect)
+            tables = insp.get_table_names()
+            columns = {tbl: {c["name"] for c in insp.get_columns(tbl)} for tbl in tables}
+            indexes = {tbl: {i["name"] for i in insp.get_indexes(tbl)} for tbl in tables}
+            return columns, indexes
+        db_schema, db_indexes = await conn.run_sync(_inspect)
 
     # 2. Compare with ORM models and build ALTER statements
     stmts: list[str] = []
@@ -64,3 +64,17 @@ async def auto_migrate(engine) -> None:
         logger.info("Auto-migrate: %d column(s) added.", len(stmts))
     else:
         logger.debug("Auto-migrate: schema up to date.")
+
+    # 4. Create indexes added to models after their table already existed
+    missing = [
+        idx
+        for table in Base.metadata.sorted_tables
+        if table.name in db_indexes
+        for idx in table.indexes
+        if idx.name not in db_indexes[table.name]
+    ]
+    if missing:
+        async with engine.begin() as conn:
+            for idx in missing:
+                logger.info("Auto-migrate: CREATE INDEX %s", idx.name)
+                await conn.run_sync(idx.create, checkfirst=True)
@@ -14,9 +14,16 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
+# CIF lookups per company before it is no longer retried; shared by the
+# cif_enrichment queries and the partial index that serves them
+CIF_MAX_INTENTOS = 2
+
+_CIF_PENDING_WHERE = f"cif IS NULL AND cif_intentos < {CIF_MAX_INTENTOS}"
+
 
 class Base(DeclarativeBase):
     pass
@@ -107,8 +114,21 @@ class Company(Base):
         Index("idx_companies_estado", "estado"),
         Index("idx_companies_cif", "cif"),
         Index("idx_companies_fecha_pub", "fecha_ultima_publicacion"),
+        Index("idx_companies_fecha_pub_id", "fecha_ultima_publicacion", "id"),
+        Index("idx_companies_nombre_id", "nombre", "id"),
         Index("idx_companies_score", "score_solvencia"),
         Index("idx_companies_cnae", "cnae_code"),
+        # Partial indexes over the companies still awaiting CIF enrichment
+        Index(
+            "idx_companies_cif_pending", "provincia", "cnae_code",
+            postgresql_where=text(_CIF_PENDING_WHERE),
+            sqlite_where=text(_CIF_PENDING_WHERE),
+        ),
+        Index(
+            "idx_companies_cif_missing_fecha", "fecha_ultima_publicacion",
+            postgresql_where=text("cif IS NULL"),
+            sqlite_where=text("cif IS NULL"),
+        ),
     )
 
 
@@ -32,7 +32,11 @@ async def lifespan(app: FastAPI):
         from sqlalchemy import text
         from app.services.fts_service import (
             CREATE_SEARCH_VECTOR_COLUMN,
+            POPULATE_SEARCH_VECTOR,
             CREATE_GIN_INDEX,
+            CREATE_TRGM_EXTENSION,
+            CREATE_NOMBRE_TRGM_INDEX,
+            CREATE_CIF_TRGM_INDEX,
             CREATE_SEARCH_TRIGGER_FUNCTION,
             DROP_SEARCH_TRIGGER,
             CREATE_SEARCH_TRIGGER,
@@ -42,7 +46,12 @@ async def lifespan(app: FastAPI):
             await conn.execute(text(CREATE_SEARCH_TRIGGER_FUNCTION))
             await conn.execute(text(DROP_SEARCH_TRIGGER))
             await conn.execute(text(CREATE_SEARCH_TRIGGER))
+            # Rows written before the trigger existed (the DB search relies on it)
+            await conn.execute(text(POPULATE_SEARCH_VECTOR))
             await conn.execute(text(CREATE_GIN_INDEX))
+            await conn.execute(text(CREATE_TRGM_EXTENSION))
+            await conn.execute(text(CREATE_NOMBRE_TRGM_INDEX))
+            await conn.execute(text(CREATE_CIF_TRGM_INDEX))
 
     # Seed reference data
     from app.db.seed_cnae import seed_all
@@ -54,6 +63,11 @@ async def lifespan(app: FastAPI):
     async with async_session() as db:
         await seed_default_users(db)
 
+    # PDF parser processes, shared by every ingestion run
+    from app.services.borme_parser import start_parse_pool
+    from app.services.ingestion_orchestrator import PDF_PARSE_WORKERS
+    start_parse_pool(PDF_PARSE_WORKERS)
+
     # Start daily scheduler
     if settings.scheduler_enabled:
         from app.scheduler import start_scheduler
@@ -66,6 +80,15 @@ async def lifespan(app: FastAPI):
         from app.scheduler import stop_scheduler
         stop_scheduler()
 
+    from app.services.http_client import close_client
+    await close_client()
+
+    from app.services.email_service import close_smtp
+    close_smtp()
+
+    from app.services.borme_parser import shutdown_parse_pool
+    shutdown_parse_pool()
+
     await engine.dispose()
 
 
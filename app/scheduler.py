@@ -38,6 +38,7 @@ async def _enrich_new_companies_cif(fecha: date):
     from app.db.engine import async_session
     from app.db.models import Company
     from app.services.cif_enrichment import lookup_full_by_name
+    from app.services.company_service import companies_changed
 
     async with async_session() as db:
         new_companies = (
@@ -77,6 +78,7 @@ async def _enrich_new_companies_cif(fecha: date):
                     break
 
         await db.commit()
+        await companies_changed(db, [c.id for c in new_companies])
         logger.info(f"[CIF] Enriched {enriched}/{len(new_companies)} companies for {fecha}")
 
 
@@ -87,6 +89,7 @@ async def _enrich_new_companies_web(fecha: date):
 
     from app.db.engine import async_session
     from app.db.models import Company
+    from app.services.company_service import companies_changed
     from app.services.web_enrichment import enrich_company_web
 
     MAX_ENRICH = 200  # Cap per day to avoid rate limits
@@ -129,6 +132,7 @@ async def _enrich_new_companies_web(fecha: date):
                         break
 
         await db.commit()
+        await companies_changed(db, [c.id for c in new_companies])
         logger.info(f"[Web] Enriched {enriched}/{len(new_companies)} companies for {fecha}")
 
 
@@ -194,6 +198,31 @@ async def daily_archive_expired():
         logger.error(f"[Scheduler] Archive failed: {e}")
 
 
+async def weekly_cluster_companies():
+    """Rewrite companies in fecha_ultima_publicacion order (PostgreSQL only).
+
+    The default search sort reads the newest publications first; keeping
+    the heap in that order means a results page touches a few adjacent
+    pages instead of one per row. CLUSTER locks the table while it runs and
+    the order decays with new writes, hence a weekly off-peak job.
+    """
+    from sqlalchemy import text
+
+    from app.config import settings
+    from app.db.engine import engine
+
+    if not settings.database_url.startswith("postgresql"):
+        return
+    logger.info("[Scheduler] Clustering companies by fecha_ultima_publicacion")
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CLUSTER companies USING idx_companies_fecha_pub_id"))
+            await conn.execute(text("ANALYZE companies"))
+        logger.info("[Scheduler] Cluster companies done")
+    except Exception as e:
+        logger.error(f"[Scheduler] Cluster companies failed: {e}")
+
+
 # --- CIF enrichment state ---
 _cif_running = False
 _cif_stop = False
@@ -202,6 +231,99 @@ _cif_stats = {
     "errors": 0, "current_company": "",
 }
 
+# Batch CIF enrichment writes attempts back in chunks of this many rows
+CIF_COMMIT_EVERY = 20
+# Columns the CIF batch reads; rows are loaded as plain tuples, not ORM objects
+_CIF_BATCH_COLUMNS = (
+    "id", "nombre", "cif_intentos", "cnae_code", "domicilio", "objeto_social",
+    "fecha_ultima_publicacion",
+)
+
+
+def _cif_batch_page(conditions: list, after):
+    """Next page of CIF-pending rows, newest first, seeking past `after`.
+
+    Each run sweeps the rows once: rows whose lookup errored (and so kept
+    their cif_intentos) are not fetched again by the same run.
+    """
+    from sqlalchemy import select, tuple_
+
+    from app.db.models import Company
+
+    key = tuple_(Company.fecha_ultima_publicacion, Company.id)
+    query = (
+        select(*(getattr(Company, col) for col in _CIF_BATCH_COLUMNS))
+        .where(*conditions)
+        .order_by(Company.fecha_ultima_publicacion.desc(), Company.id.desc())
+        .limit(100)
+    )
+    if after is not None:
+        query = query.where(key < tuple_(after.fecha_ultima_publicacion, after.id))
+    return query
+
+
+def _cif_update_values(row, result: dict | None) -> dict:
+    """Bulk-update mapping for one CIF lookup attempt (changed columns only)."""
+    values = {"id": row.id, "cif_intentos": (row.cif_intentos or 0) + 1}
+    if result and result.get("cif"):
+        values["cif"] = result["cif"]
+        for field in ("cnae_code", "domicilio", "objeto_social"):
+            if result.get(field) and not getattr(row, field):
+                values[field] = result[field]
+    return values
+
+
+async def _lookup_cif_chunk(companies, stats: dict, tag: str) -> list[dict]:
+    """Look up a chunk of companies concurrently; returns their update mappings.
+
+    At most ENRICH_CONCURRENCY lookups run at once; per-host rate limiting
+    happens inside the scrapers, so no sleep is needed between companies.
+    Lookups that errored on every source get no mapping.
+    """
+    from app.services.cif_enrichment import ENRICH_CONCURRENCY, lookup_full_by_name
+
+    sem = asyncio.Semaphore(ENRICH_CONCURRENCY)
+    pending: list[dict] = []
+
+    async def _one(c) -> None:
+        async with sem:
+            if _cif_stop:
+                return
+            stats["attempted"] += 1
+            stats["current_company"] = c.nombre[:60]
+            result = None
+            try:
+                result = await lookup_full_by_name(c.nombre)
+                if result and result.get("cif"):
+                    stats["found"] += 1
+            except Exception as e:
+                # Every source errored: not an attempt, cif_intentos is kept
+                stats["errors"] += 1
+                logger.warning(f"{tag} Error {c.nombre}: {e}")
+                return
+            pending.append(_cif_update_values(c, result))
+
+    async with asyncio.TaskGroup() as tg:
+        for c in companies:
+            tg.create_task(_one(c))
+    return pending
+
+
+async def _flush_cif_updates(db, pending: list[dict]) -> None:
+    """Write pending CIF attempts as one executemany UPDATE and commit."""
+    if not pending:
+        return
+    from sqlalchemy import update
+
+    from app.db.models import Company
+    from app.services.company_service import companies_changed
+
+    await db.execute(update(Company), pending)
+    await db.commit()
+    await companies_changed(db, [values["id"] for values in pending if "cif" in values])
+    pending.clear()
+
+
 # --- Web/contact enrichment state ---
 _web_running = False
 _web_stop = False
@@ -252,8 +374,9 @@ async def enrichment_cif():
 
     - Skips companies with cif_intentos >= 2 (already tried, not found).
     - Increments cif_intentos on each attempt so failures are not retried endlessly.
-    - No offset pagination — always fetches next untried batch.
-    - Short waits between companies (1-2s) to maximize coverage.
+    - Keyset pagination: each run sweeps the pending rows once, newest first.
+    - A chunk where no CIF source answered ends the run (outage or block).
+    - Companies are looked up concurrently in chunks; rate limiting is per host.
     """
     global _cif_running, _cif_stop
     if _cif_running:
@@ -265,17 +388,15 @@ async def enrichment_cif():
     from sqlalchemy import select, func as f
     from app.db.engine import async_session
     from app.db.models import Company
-    from app.services.cif_enrichment import lookup_full_by_name
+    from app.services.cif_enrichment import MAX_INTENTOS, cif_pending_conditions
 
     stats = _cif_stats
     stats.update({"total": 0, "attempted": 0, "found": 0, "errors": 0, "current_company": ""})
 
-    MAX_INTENTOS = 2
-
     try:
         async with async_session() as db:
             # Count companies that still have a chance (not yet exhausted retries)
-            base_filter = [Company.cif.is_(None), Company.cif_intentos < MAX_INTENTOS]
+            base_filter = cif_pending_conditions()
             total = await db.scalar(select(f.count(Company.id)).where(*base_filter)) or 0
             stats["total"] = total
             logger.info(f"[CIF Batch] {total} companies without CIF (intentos < {MAX_INTENTOS})")
@@ -284,37 +405,25 @@ async def enrichment_cif():
                 logger.info("[CIF Batch] Nothing to do")
                 return stats
 
-            while not _cif_stop:
-                companies = (await db.scalars(
-                    select(Company).where(*base_filter)
-                    .order_by(Company.fecha_ultima_publicacion.desc())
-                    .limit(100)
-                )).all()
+            after = None
+            outage = False
+            while not _cif_stop and not outage:
+                companies = (await db.execute(_cif_batch_page(base_filter, after))).all()
                 if not companies:
                     break
-                for c in companies:
+                after = companies[-1]
+                for i in range(0, len(companies), CIF_COMMIT_EVERY):
                     if _cif_stop:
                         break
-                    stats["attempted"] += 1
-                    stats["current_company"] = c.nombre[:60]
-                    c.cif_intentos = (c.cif_intentos or 0) + 1
-                    try:
-                        result = await lookup_full_by_name(c.nombre)
-                        if result and result.get("cif"):
-                            c.cif = result["cif"]
-                            if result.get("cnae_code") and not c.cnae_code:
-                                c.cnae_code = result["cnae_code"]
-                            if result.get("domicilio") and not c.domicilio:
-                                c.domicilio = result["domicilio"]
-                            if result.get("objeto_social") and not c.objeto_social:
-                                c.objeto_social = result["objeto_social"]
-                            stats["found"] += 1
-                        await asyncio.sleep(random.uniform(1.0, 2.5))
-                    except Exception as e:
-                        stats["errors"] += 1
-                        logger.warning(f"[CIF Batch] Error {c.nombre}: {e}")
-                        await asyncio.sleep(random.uniform(2, 5))
-                await db.commit()
+                    chunk = companies[i:i + CIF_COMMIT_EVERY]
+                    pending = await _lookup_cif_chunk(chunk, stats, "[CIF Batch]")
+                    answered = bool(pending)
+                    await _flush_cif_updates(db, pending)
+                    if not answered and not _cif_stop:
+                        # Every lookup errored: sources down or blocking us
+                        logger.warning("[CIF Batch] No CIF source answered a whole chunk, ending run")
+                        outage = True
+                        break
                 logger.info(f"[CIF Batch] {stats['attempted']}/{total}, found: {stats['found']}")
 
         logger.info(f"[CIF Batch] {'Stopped' if _cif_stop else 'Completed'}: {stats}")
@@ -343,17 +452,16 @@ async def enrichment_cif_filtered(filters: dict):
     from sqlalchemy import select, func as f
     from app.db.engine import async_session
     from app.db.models import Company
-    from app.services.cif_enrichment import lookup_full_by_name
+    from app.services.cif_enrichment import cif_pending_conditions
 
     stats = _cif_stats
     stats.update({"total": 0, "attempted": 0, "found": 0, "errors": 0, "current_company": ""})
 
-    MAX_INTENTOS = 2
     max_companies = filters.get("max_companies", 500)
 
     try:
         async with async_session() as db:
-            conditions = [Company.cif.is_(None), Company.cif_intentos < MAX_INTENTOS]
+            conditions = cif_pending_conditions()
             if filters.get("provincia"):
                 conditions.append(Company.provincia == filters["provincia"])
             if filters.get("cnae_code"):
@@ -372,38 +480,27 @@ async def enrichment_cif_filtered(filters: dict):
                 return stats
 
             processed = 0
-            while not _cif_stop and processed < max_companies:
-                companies = (await db.scalars(
-                    select(Company).where(*conditions)
-                    .order_by(Company.fecha_ultima_publicacion.desc())
-                    .limit(100)
-                )).all()
+            after = None
+            outage = False
+            while not _cif_stop and not outage and processed < max_companies:
+                companies = (await db.execute(_cif_batch_page(conditions, after))).all()
                 if not companies:
                     break
-                for c in companies:
-                    if _cif_stop or processed >= max_companies:
+                companies = companies[:max_companies - processed]
+                after = companies[-1]
+                for i in range(0, len(companies), CIF_COMMIT_EVERY):
+                    if _cif_stop:
+                        break
+                    chunk = companies[i:i + CIF_COMMIT_EVERY]
+                    pending = await _lookup_cif_chunk(chunk, stats, "[CIF Batch Filtered]")
+                    answered = bool(pending)
+                    processed += len(chunk)
+                    await _flush_cif_updates(db, pending)
+                    if not answered and not _cif_stop:
+                        # Every lookup errored: sources down or blocking us
+                        logger.warning("[CIF Batch Filtered] No CIF source answered a whole chunk, ending run")
+                        outage = True
                         break
-                    processed += 1
-                    stats["attempted"] += 1
-                    stats["current_company"] = c.nombre[:60]
-                    c.cif_intentos = (c.cif_intentos or 0) + 1
-                    try:
-                        result = await lookup_full_by_name(c.nombre)
-                        if result and result.get("cif"):
-                            c.cif = result["cif"]
-                            if result.get("cnae_code") and not c.cnae_code:
-                                c.cnae_code = result["cnae_code"]
-                            if result.get("domicilio") and not c.domicilio:
-                                c.domicilio = result["domicilio"]
-                            if result.get("objeto_social") and not c.objeto_social:
-                                c.objeto_social = result["objeto_social"]
-                            stats["found"] += 1
-                        await asyncio.sleep(random.uniform(1.0, 2.5))
-                    except Exception as e:
-                        stats["errors"] += 1
-                        logger.warning(f"[CIF Batch Filtered] Error {c.nombre}: {e}")
-                        await asyncio.sleep(random.uniform(2, 5))
-                await db.commit()
                 logger.info(f"[CIF Batch Filtered] {stats['attempted']}/{total}, found: {stats['found']}")
 
         logger.info(f"[CIF Batch Filtered] {'Stopped' if _cif_stop else 'Completed'}: {stats}")
@@ -422,7 +519,8 @@ async def enrichment_web():
 
     - Skips companies with web_intentos >= 2 (already tried, not found).
     - Increments web_intentos on each attempt so failures are not retried endlessly.
-    - No offset pagination — always fetches next untried batch.
+    - Keyset pagination: each run sweeps the pending rows once, newest first.
+    - A chunk where no CIF source answered ends the run (outage or block).
     - Short waits between companies (2-4s) to maximize coverage.
     """
     global _web_running, _web_stop
@@ -435,6 +533,7 @@ async def enrichment_web():
     from sqlalchemy import select, func as f
     from app.db.engine import async_session
     from app.db.models import Company
+    from app.services.company_service import companies_changed
     from app.services.web_enrichment import enrich_company_web
     import httpx
 
@@ -496,6 +595,7 @@ async def enrichment_web():
                             else:
                                 await asyncio.sleep(random.uniform(3, 6))
                     await db.commit()
+                    await companies_changed(db, [c.id for c in companies])
                     logger.info(f"[Web Batch] {stats['attempted']}/{total}, found: {stats['found']}")
 
         logger.info(f"[Web Batch] {'Stopped' if _web_stop else 'Completed'}: {stats}")
@@ -524,6 +624,7 @@ async def enrichment_web_filtered(filters: dict):
     from sqlalchemy import select, func as f
     from app.db.engine import async_session
     from app.db.models import Company
+    from app.services.company_service import companies_changed
     from app.services.web_enrichment import enrich_company_web
     import httpx
 
@@ -592,6 +693,7 @@ async def enrichment_web_filtered(filters: dict):
                             else:
                                 await asyncio.sleep(random.uniform(3, 6))
                     await db.commit()
+                    await companies_changed(db, [c.id for c in companies])
                     logger.info(f"[Web Batch Filtered] {stats['attempted']}/{total}, found: {stats['found']}")
 
         logger.info(f"[Web Batch Filtered] {'Stopped' if _web_stop else 'Completed'}: {stats}")
@@ -659,11 +761,19 @@ def start_scheduler(hour: int = 10, minute: int = 0):
         replace_existing=True,
     )
 
+    # Re-cluster companies for the default sort, Sundays off-peak
+    scheduler.add_job(
+        weekly_cluster_companies,
+        CronTrigger(day_of_week="sun", hour=4, minute=0),
+        id="weekly_cluster_companies",
+        replace_existing=True,
+    )
+
     scheduler.start()
     logger.info(
         f"[Scheduler] Started - daily updates at {hour:02d}:{minute:02d}, "
         f"{hour:02d}:{minute+15:02d}, {hour:02d}:{minute+30:02d}, {hour:02d}:{minute+45:02d}, "
-        f"archive at 00:05"
+        f"archive at 00:05, companies cluster Sundays 04:00"
     )
 
 
@@ -24,6 +24,7 @@ class SearchFilters(BaseModel):
     sort_order: str = "desc"
     page: int = Field(default=1, ge=1)
     per_page: int = Field(default=25, ge=1, le=100)
+    cursor: str | None = None  # keyset cursor from a previous page's next_cursor
 
     @property
     def offset(self) -> int:
@@ -32,7 +33,8 @@ class SearchFilters(BaseModel):
 
 class PaginatedResponse(BaseModel):
     items: list
-    total: int
+    total: int | None
     page: int
-    pages: int
+    pages: int | None
     per_page: int
+    next_cursor: str | None = None
@@ -5,20 +5,42 @@ from __future__ import annotations
 BOE publishes subsidies in Sección V.B (Otros anuncios oficiales - Subvenciones).
 The API returns an XML sumario with items linking to each publication.
 """
+import asyncio
+import functools
+import io
 import logging
 import re
 from datetime import date
-from typing import Optional
 
+import ahocorasick
+import diskcache
 import httpx
 from lxml import etree
 
 from app.config import settings
+from app.services.geo_sector import detect_ccaa_from_text, detect_provincia_from_text
+from app.services.http_client import get_client
 
 logger = logging.getLogger(__name__)
 
 BOE_BASE = "https://www.boe.es"
 
+# Reused across documents. Blank text is kept: it separates paragraphs in the
+# <texto> dump used for the description.
+_DETAIL_PARSER = etree.XMLParser(
+    collect_ids=False, huge_tree=True, resolve_entities=False,
+)
+
+
+@functools.cache
+def _detail_cache() -> diskcache.Cache:
+    """On-disk cache of BOE document XML keyed by BOE id.
+
+    Published documents never change, so ingestion reruns reuse them
+    instead of hitting the BOE again.
+    """
+    return diskcache.Cache(str(settings.boe_cache_dir))
+
 
 async def fetch_boe_subsidies(fecha: date) -> list[dict]:
     """Fetch subsidies published on a given date from BOE sumario.
@@ -28,8 +50,8 @@ async def fetch_boe_subsidies(fecha: date) -> list[dict]:
     url = f"{BOE_BASE}/datosabiertos/api/boe/sumario/{fecha.strftime('%Y%m%d')}"
     logger.info(f"Fetching BOE sumario for subsidies: {url}")
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.get(url, headers={"Accept": "application/xml"})
+    client = get_client()
+    resp = await client.get(url, headers={"Accept": "application/xml"})
 
     if resp.status_code == 404:
         logger.info(f"No BOE published for {fecha}")
@@ -41,18 +63,58 @@ async def fetch_boe_subsidies(fecha: date) -> list[dict]:
 
     items = _parse_subsidies_from_sumario(fecha, resp.content)
 
-    # Fetch detail for each item to get full description
+    # Only titles that read as subsidies are worth a detail round trip; the
+    # rest keep the sumario data plus what can be derived from it.
+    to_fetch = []
     subsidies = []
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for item in items:
-            detail = await _fetch_item_detail(client, item)
-            if detail:
-                subsidies.append(detail)
+    for item in items:
+        if item.pop("confidence") >= DETAIL_MIN_CONFIDENCE:
+            to_fetch.append(item)
+        else:
+            _enrich_item(item)
+            subsidies.append(item)
+
+    # Fetch detail for each item to get full description
+    for item in to_fetch:
+        detail = await _fetch_item_detail(client, item)
+        if detail:
+            subsidies.append(detail)
 
     logger.info(f"Found {len(subsidies)} subsidies for {fecha}")
     return subsidies
 
 
+# Keywords that indicate a subsidy/grant
+SUBSIDY_KW = [
+    "subvenci", "ayudas", "bases reguladora",
+    "becas", "financiaci", "incentivo",
+    "concesión directa", "línea de ayuda",
+    "convocatoria de concesión",
+]
+# False-positive exclusions (checked BEFORE subsidy keywords)
+EXCLUDE_KW = [
+    "hidrogr", "portuaria", "confederación",
+    "regantes", "comunidad de regantes",
+    "junta general", "asamblea",
+    "convocatoria de junta", "convocatoria de sesión",
+    "convocatoria de asamblea",
+    "mutualidad", "funcionarios civiles",
+    "licitación", "levantamiento de acta",
+    "expropiación", "información pública",
+    "notificación", "edicto",
+]
+
+_SUBSIDY_RE = re.compile("|".join(map(re.escape, SUBSIDY_KW)))
+_EXCLUDE_RE = re.compile("|".join(map(re.escape, EXCLUDE_KW)))
+
+_WS_RE = re.compile(r"\s+")
+
+# Minimum distinct SUBSIDY_KW hits in a title to fetch the item's detail XML.
+# Most real convocatorias name a single keyword ("ayudas", "subvenciones"), so
+# anything that passes _EXCLUDE_RE is fetched; raise this only with evidence.
+DETAIL_MIN_CONFIDENCE = 1
+
+
 def _parse_subsidies_from_sumario(fecha: date, xml_content: bytes) -> list[dict]:
     """Parse BOE sumario XML to extract subsidy items.
 
@@ -62,86 +124,129 @@ def _parse_subsidies_from_sumario(fecha: date, xml_content: bytes) -> list[dict]
 
     Items can be children of ``<epigrafe>`` or direct children of
     ``<departamento>`` (section 5B has no epigrafes).
+
+    The sumario is streamed with ``iterparse``: each ``<item>`` is cleared
+    once handled and each container when it closes, so memory stays flat
+    regardless of sumario size. The enclosing section, department and
+    epigrafe come from start events, so items never walk up the tree.
     """
-    root = etree.fromstring(xml_content)
     items = []
 
-    # Keywords that indicate a subsidy/grant
-    SUBSIDY_KW = [
-        "subvenci", "ayudas", "bases reguladora",
-        "becas", "financiaci", "incentivo",
-        "concesión directa", "línea de ayuda",
-        "convocatoria de concesión",
-    ]
-    # False-positive exclusions (checked BEFORE subsidy keywords)
-    EXCLUDE_KW = [
-        "hidrogr", "portuaria", "confederación",
-        "regantes", "comunidad de regantes",
-        "junta general", "asamblea",
-        "convocatoria de junta", "convocatoria de sesión",
-        "convocatoria de asamblea",
-        "mutualidad", "funcionarios civiles",
-        "licitación", "levantamiento de acta",
-        "expropiación", "información pública",
-        "notificación", "edicto",
-    ]
-
-    for seccion in root.iter("seccion"):
-        codigo = seccion.get("codigo", "")
-        # Subsidies appear in sections 3 and 5B (NOT 5A = tenders)
-        if codigo not in ("3", "5B"):
+    context = etree.iterparse(
+        io.BytesIO(xml_content),
+        events=("start", "end"),
+        tag=("seccion", "departamento", "epigrafe", "item"),
+        collect_ids=False,
+        remove_blank_text=True,
+        huge_tree=True,
+        resolve_entities=False,
+    )
+
+    # Subsidies appear in sections 3 and 5B (NOT 5A = tenders)
+    in_subsidy_section = False
+    dept_name = ""
+    ep_name = ""
+
+    for event, elem in context:
+        tag = elem.tag
+        if event == "start":
+            if tag == "seccion":
+                in_subsidy_section = elem.get("codigo", "") in ("3", "5B")
+            elif tag == "departamento":
+                dept_name = elem.get("nombre", "")
+                ep_name = ""
+            elif tag == "epigrafe":
+                ep_name = elem.get("nombre", "")
             continue
 
-        for departamento in seccion.findall(".//departamento"):
-            dept_name = departamento.get("nombre", "")
-
-            # Items can be under <epigrafe> or directly under <departamento>
-            all_items = departamento.findall(".//item")
-
-            for item in all_items:
-                id_elem = item.find("identificador")
-                item_id = id_elem.text.strip() if id_elem is not None and id_elem.text else ""
-
-                titulo_elem = item.find("titulo")
-                titulo = titulo_elem.text.strip() if titulo_elem is not None and titulo_elem.text else ""
+        if tag != "item":
+            # Containers are cleared as they close, freeing their item shells
+            # in one go instead of pruning siblings item by item.
+            if tag == "epigrafe":
+                # Items after this point hang directly from <departamento>
+                ep_name = ""
+            elem.clear(keep_tail=True)
+            continue
 
-                url_html_elem = item.find("url_html")
-                url_html = ""
-                if url_html_elem is not None and url_html_elem.text:
-                    url_html = url_html_elem.text.strip()
+        if in_subsidy_section:
+            id_elem = elem.find("identificador")
+            item_id = id_elem.text.strip() if id_elem is not None and id_elem.text else ""
 
-                url_pdf_elem = item.find("url_pdf")
-                url_pdf = ""
-                if url_pdf_elem is not None and url_pdf_elem.text:
-                    url_pdf = url_pdf_elem.text.strip()
+            titulo_elem = elem.find("titulo")
+            titulo = titulo_elem.text.strip() if titulo_elem is not None and titulo_elem.text else ""
 
-                # Determine epigrafe (parent may be epigrafe or departamento)
-                parent = item.getparent()
-                ep_name = parent.get("nombre", "") if parent is not None and parent.tag == "epigrafe" else ""
+            url_html_elem = elem.find("url_html")
+            url_html = ""
+            if url_html_elem is not None and url_html_elem.text:
+                url_html = url_html_elem.text.strip()
 
-                titulo_lower = titulo.lower()
+            url_pdf_elem = elem.find("url_pdf")
+            url_pdf = ""
+            if url_pdf_elem is not None and url_pdf_elem.text:
+                url_pdf = url_pdf_elem.text.strip()
 
-                # Exclude false positives first (regantes, licitaciones, etc.)
-                if any(ex in titulo_lower for ex in EXCLUDE_KW):
-                    continue
+            titulo_lower = titulo.lower()
 
-                is_subsidy = any(kw in titulo_lower for kw in SUBSIDY_KW)
+            # Exclude false positives first (regantes, licitaciones, etc.)
+            is_subsidy = (
+                _EXCLUDE_RE.search(titulo_lower) is None
+                and _SUBSIDY_RE.search(titulo_lower) is not None
+            )
 
-                if item_id and titulo and is_subsidy:
-                    items.append({
-                        "boe_id": item_id,
-                        "titulo": titulo,
-                        "organismo": dept_name,
-                        "url_html": url_html,
-                        "url_pdf": url_pdf,
-                        "fecha_publicacion": fecha,
-                        "sector": ep_name if ep_name else None,
-                    })
+            if item_id and titulo and is_subsidy:
+                # Distinct subsidy keywords in the title: how sure we are
+                # before paying for the detail document.
+                confidence = len(set(_SUBSIDY_RE.findall(titulo_lower)))
+                items.append({
+                    "boe_id": item_id,
+                    "titulo": titulo,
+                    "organismo": dept_name,
+                    "url_html": url_html,
+                    "url_pdf": url_pdf,
+                    "fecha_publicacion": fecha,
+                    "sector": ep_name if ep_name else None,
+                    "confidence": confidence,
+                })
+
+        elem.clear(keep_tail=True)
 
     return items
 
 
-async def _fetch_item_detail(client: httpx.AsyncClient, item: dict) -> Optional[dict]:
+@functools.lru_cache(maxsize=512)
+def _detect_geo_cached(organismo: str, ambito: str) -> tuple[str | None, str | None]:
+    """(CCAA, provincia) for an organismo/ambito pair."""
+    combined = f"{organismo} {ambito}"
+    return detect_ccaa_from_text(combined), detect_provincia_from_text(combined)
+
+
+def _enrich_item(item: dict) -> None:
+    """Derive importe, geography and CNAE from the text gathered for an item."""
+    # Try to extract importe (amount)
+    titulo_text = item.get("titulo", "") + " " + item.get("descripcion", "")
+    importe = _extract_importe(titulo_text)
+    if importe:
+        item["importe"] = importe
+
+    # Extract comunidad_autonoma and provincia. The issuing body and scope
+    # repeat across many items and decide first; the title fills any gap.
+    ccaa, prov = _detect_geo_cached(item.get("organismo", ""), item.get("ambito", ""))
+    if not ccaa or not prov:
+        titulo = item.get("titulo", "")
+        ccaa = ccaa or detect_ccaa_from_text(titulo)
+        prov = prov or detect_provincia_from_text(titulo)
+    if ccaa:
+        item["comunidad_autonoma"] = ccaa
+    if prov:
+        item["provincia"] = prov
+
+    # Detect CNAE from text
+    cnae = _detect_cnae_from_text(f"{item.get('titulo', '')} {item.get('descripcion', '')}")
+    if cnae:
+        item["cnae_codes"] = cnae
+
+
+async def _fetch_item_detail(client: httpx.AsyncClient, item: dict) -> dict | None:
     """Fetch BOE document XML to get full description and metadata.
 
     The /api/boe/documento/ endpoint does NOT exist. Instead we use
@@ -149,31 +254,38 @@ async def _fetch_item_detail(client: httpx.AsyncClient, item: dict) -> Optional[
     """
     boe_id = item["boe_id"]
     url = f"{BOE_BASE}/diario_boe/xml.php?id={boe_id}"
+    cache_key = f"boe:{boe_id}"
 
     try:
-        resp = await client.get(url)
-        if resp.status_code != 200:
-            return item
+        # diskcache is blocking SQLite I/O; keep it off the event loop
+        content = await asyncio.to_thread(_detail_cache().get, cache_key)
+        cached = content is not None
+        if not cached:
+            resp = await client.get(url)
+            if resp.status_code != 200:
+                return item
+            content = resp.content
 
-        root = etree.fromstring(resp.content)
+        root = etree.fromstring(content, _DETAIL_PARSER)
 
         # Some BOE-B documents return <error> instead of <documento>
         if root.tag == "error":
             logger.debug(f"BOE XML API returned error for {boe_id}, skipping detail")
             return item
 
+        if not cached:
+            await asyncio.to_thread(
+                _detail_cache().set,
+                cache_key, content, expire=settings.boe_cache_days * 86400,
+            )
+
         # <texto> may contain child elements (p, table, etc.)
         texto_elem = root.find(".//texto")
         if texto_elem is not None:
             full_text = etree.tostring(texto_elem, method="text", encoding="unicode")
             if full_text:
-                item["descripcion"] = " ".join(full_text.split())[:2000]
-
-        # Try to extract importe (amount)
-        titulo_text = item.get("titulo", "") + " " + item.get("descripcion", "")
-        importe = _extract_importe(titulo_text)
-        if importe:
-            item["importe"] = importe
+                # Truncate before normalizing: only the first 2000 chars are kept
+                item["descripcion"] = _WS_RE.sub(" ", full_text[:8000]).strip()[:2000]
 
         # Extract ambito (geographic scope)
         ambito_elem = root.find(".//ambito_geografico")
@@ -186,21 +298,7 @@ async def _fetch_item_detail(client: httpx.AsyncClient, item: dict) -> Optional[
                 item["beneficiarios"] = materia.text.strip()[:500]
                 break
 
-        # Extract comunidad_autonoma and provincia
-        from app.services.geo_sector import detect_ccaa_from_text, detect_provincia_from_text
-        combined = f"{item.get('organismo', '')} {item.get('ambito', '')} {item.get('titulo', '')}"
-        ccaa = detect_ccaa_from_text(combined)
-        if ccaa:
-            item["comunidad_autonoma"] = ccaa
-        prov = detect_provincia_from_text(combined)
-        if prov:
-            item["provincia"] = prov
-
-        # Detect CNAE from text
-        cnae = _detect_cnae_from_text(f"{item.get('titulo', '')} {item.get('descripcion', '')}")
-        if cnae:
-            item["cnae_codes"] = cnae
-
+        _enrich_item(item)
         return item
 
     except Exception as e:
@@ -238,16 +336,42 @@ _SUBSIDY_CNAE_MAP = [
 ]
 
 
-def _detect_cnae_from_text(text: str) -> Optional[str]:
-    """Detect CNAE codes from subsidy text content."""
+def _build_cnae_automaton() -> ahocorasick.Automaton:
+    """Aho-Corasick automaton over every CNAE keyword.
+
+    A keyword may belong to several entries (e.g. "forestal"), so each word
+    carries the indexes of all its ``_SUBSIDY_CNAE_MAP`` entries.
+    """
+    entries: dict[str, set[int]] = {}
+    for idx, (keywords, _cnae) in enumerate(_SUBSIDY_CNAE_MAP):
+        for kw in keywords:
+            entries.setdefault(kw.lower(), set()).add(idx)
+    automaton = ahocorasick.Automaton()
+    for kw, idxs in entries.items():
+        automaton.add_word(kw, tuple(idxs))
+    automaton.make_automaton()
+    return automaton
+
+
+_CNAE_AUTOMATON = _build_cnae_automaton()
+
+
+def _detect_cnae_from_text(text: str) -> str | None:
+    """Detect CNAE codes from subsidy text content.
+
+    A single Aho-Corasick pass finds every keyword; codes are returned in
+    ``_SUBSIDY_CNAE_MAP`` order.
+    """
     if not text:
         return None
-    text_lower = text.lower()
+    hits: set[int] = set()
+    for _end, idxs in _CNAE_AUTOMATON.iter(text.lower()):
+        hits.update(idxs)
     codes = []
-    for keywords, cnae in _SUBSIDY_CNAE_MAP:
-        if any(kw.lower() in text_lower for kw in keywords):
-            if cnae not in codes:
-                codes.append(cnae)
+    for idx in sorted(hits):
+        cnae = _SUBSIDY_CNAE_MAP[idx][1]
+        if cnae not in codes:
+            codes.append(cnae)
     return ",".join(codes) if codes else None
 
 
@@ -273,21 +397,30 @@ async def reclassify_cnae(db) -> dict:
     return updated
 
 
-def _extract_importe(text: str) -> Optional[float]:
+# Match patterns like "1.234.567,89 euros" or "1.234.567 €"; failing that, the
+# first amount after "importe". Anchored lazy prefixes keep that priority while
+# running both alternatives from a single compiled pattern.
+_RE_IMPORTE = re.compile(
+    r"^(?:[\s\S]*?(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s*(?:euros|€|EUR)"
+    r"|[\s\S]*?importe.*?(\d{1,3}(?:\.\d{3})*(?:,\d{2})?))",
+    re.IGNORECASE,
+)
+
+
+def _extract_importe(text: str) -> float | None:
     """Try to extract monetary amount from text."""
     if not text:
         return None
-    # Match patterns like "1.234.567,89 euros" or "1.234.567 €"
-    patterns = [
-        r'(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s*(?:euros|€|EUR)',
-        r'importe.*?(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
-    ]
-    for pattern in patterns:
-        m = re.search(pattern, text, re.IGNORECASE)
-        if m:
-            amount_str = m.group(1).replace(".", "").replace(",", ".")
-            try:
-                return float(amount_str)
-            except ValueError:
-                continue
-    return None
+    return _extract_importe_cached(text)
+
+
+@functools.lru_cache(maxsize=2048)
+def _extract_importe_cached(text: str) -> float | None:
+    m = _RE_IMPORTE.search(text)
+    if not m:
+        return None
+    amount_str = (m.group(1) or m.group(2)).replace(".", "").replace(",", ".")
+    try:
+        return float(amount_str)
+    except ValueError:
+        return None
@@ -5,13 +5,18 @@ import logging
 from dataclasses import dataclass, field
 from datetime import date
 
-import httpx
 from lxml import etree
 
 from app.config import settings
+from app.services.http_client import get_client
 
 logger = logging.getLogger(__name__)
 
+# Reused across sumarios: skips whitespace-only text nodes and ID bookkeeping.
+_PARSER = etree.XMLParser(
+    collect_ids=False, remove_blank_text=True, huge_tree=True, resolve_entities=False,
+)
+
 
 @dataclass
 class BormePdfEntry:
@@ -36,8 +41,7 @@ async def fetch_sumario(fecha: date) -> BormeSumario | None:
     url = f"{settings.boe_api_base}/borme/sumario/{fecha.strftime('%Y%m%d')}"
     logger.info(f"Fetching BORME sumario: {url}")
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.get(url, headers={"Accept": "application/xml"})
+    resp = await get_client().get(url, headers={"Accept": "application/xml"})
 
     if resp.status_code == 404:
         logger.info(f"No BORME published for {fecha} (404)")
@@ -57,7 +61,7 @@ def _parse_sumario_xml(fecha: date, xml_content: bytes) -> BormeSumario:
     response > data > sumario > diario > seccion[@codigo='A'] > item
     Each item has: <identificador>, <titulo> (province name), <url_pdf>
     """
-    root = etree.fromstring(xml_content)
+    root = etree.fromstring(xml_content, _PARSER)
     sumario = BormeSumario(fecha=fecha)
 
     # Find Section A (Actos inscritos)
@@ -2,16 +2,34 @@ from __future__ import annotations
 
 """Parse BORME PDF files to extract company data.
 
-Uses pdfminer.six for text extraction and regex patterns modeled on
-bormeparser's extraction logic.
+Uses PyMuPDF for text extraction (pdfminer.six as fallback) and regex
+patterns modeled on bormeparser's extraction logic.
 """
-import json
+import bisect
 import logging
+import multiprocessing
+import os
 import re
+import string
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
 from pathlib import Path
 
+import ahocorasick
+import orjson
 from pdfminer.high_level import extract_text
+from pdfminer.psparser import PSException
+
+try:
+    import pymupdf
+except ImportError:  # fall back to the pure-Python extractor
+    pymupdf = None
+
+_MUPDF_TEXT_FLAGS = (
+    pymupdf.TEXT_PRESERVE_WHITESPACE | pymupdf.TEXT_MEDIABOX_CLIP if pymupdf else 0
+)
 
 logger = logging.getLogger(__name__)
 
@@ -45,66 +63,115 @@ ACT_TYPES = [
     "Otros conceptos",
 ]
 
-ACT_PATTERN = re.compile(
-    r"(" + "|".join(re.escape(a) for a in ACT_TYPES) + r")\.\s*",
-    re.IGNORECASE,
-)
+# Longest-first so an act name never loses to a shorter alternative sharing
+# its prefix (Python's alternation takes the first branch that matches).
+_ACT_TYPES_SORTED = sorted(ACT_TYPES, key=len, reverse=True)
+
+# Lowercase: block patterns run case-sensitively over the lowercased text
+_ACT_ALTERNATION = "|".join(re.escape(a.lower()) for a in _ACT_TYPES_SORTED)
+
+# Acts whose text lists appointed/removed officers
+OFFICER_ACTS = frozenset({"Nombramientos", "Ceses/Dimisiones", "Reelecciones", "Revocaciones"})
+
+# Matched act header (lowercased, the sweep is case-insensitive) ->
+# (canonical act name, whether its text carries officers)
+_ACT_INFO = {a.lower(): (a, a in OFFICER_ACTS) for a in ACT_TYPES}
 
 # Company entry header: "123 - EMPRESA EJEMPLO SL." or "123.- EMPRESA EJEMPLO SL."
+# The name runs greedily to the line's trailing period, so a line without one
+# fails after a single backtrack instead of retrying every lazy extension.
 RE_COMPANY_HEADER = re.compile(
-    r"^(\d+)\s*[\.\-]+\s*(.+?)(?:\.\s*$|\.$)",
+    r"^(\d++)\s*[.\-]+\s*(.+)\.[^\S\n]*$",
     re.MULTILINE,
 )
 
-# Capital: "Capital: 3.000,00 Euros." or "Capital suscrito: 60.000 Euros."
-RE_CAPITAL = re.compile(
-    r"Capital(?:\s+suscrito)?:\s+([\d\.,]+)\s+(Euros?|€|Pesetas)",
-    re.IGNORECASE,
-)
-
-# Constitution date: "Comienzo de operaciones: 15.01.25" or "15/01/2025"
-RE_FECHA_INICIO = re.compile(
-    r"Comienzo\s+de\s+operaciones:\s+(\d{1,2}[./]\d{1,2}[./]\d{2,4})",
-    re.IGNORECASE,
-)
-
-# Objeto social: "Objeto social: text..."
-RE_OBJETO = re.compile(
-    r"Objeto\s+social:\s+(.+?)(?=\.\s+Domicilio:|\.\s+Capital:|\.\s+Comienzo|\.\s*$)",
-    re.DOTALL | re.IGNORECASE,
+# Two adjacent letters: real names have them, registration fragments do not
+RE_NAME_LETTERS = re.compile(r"[A-ZÁÉÍÓÚÑa-záéíóúñ]{2}")
+
+# Company block tokenizer: act headers and constitution fields in one sweep.
+#   Act: "Constitución." / "Nombramientos." ... (any of ACT_TYPES)
+#   Capital: "Capital: 3.000,00 Euros." or "Capital suscrito: 60.000 Euros."
+#   Comienzo de operaciones: "15.01.25" or "15/01/2025"
+#   Objeto social: "Objeto social: text..."
+#   Domicilio: "Domicilio: text..."
+# Free-text values are captured inside a lookahead, so the sweep resumes right
+# after the label and act headers inside a value are still seen. They end at
+# the next field label, at the next act header or at the end of the block.
+# The sweep runs over the lowercased text (see _lower) rather than with
+# re.IGNORECASE, which keeps literal prefixes fast; values are sliced from the
+# original text by span.
+_VALUE_END = rf"\.\s*(?:$|(?:{_ACT_ALTERNATION})\.)"
+RE_BLOCK_TOKENS = re.compile(
+    rf"(?P<act>{_ACT_ALTERNATION})\.\s*"
+    r"|(?P<cap>capital(?:\s+suscrito)?:\s+(?P<cap_amt>[\d\.,]+)\s+(?P<cap_mon>euros?|€|pesetas))"
+    r"|(?P<fec>comienzo\s+de\s+operaciones:\s+(?P<fec_val>\d{1,2}[./]\d{1,2}[./]\d{2,4}))"
+    r"|(?P<obj>objeto\s+social:\s+(?=(?P<obj_val>.+?)"
+    rf"(?:\.\s+domicilio:|\.\s+capital(?:\s+suscrito)?:|\.\s+comienzo|{_VALUE_END})))"
+    r"|(?P<dom>domicilio:\s+(?=(?P<dom_val>.+?)"
+    r"(?:\.\s+capital(?:\s+suscrito)?:|\.\s+objeto\s+social:|\.\s+comienzo|\.\s+datos"
+    rf"|{_VALUE_END})))",
+    re.DOTALL,
 )
 
-# Domicilio: "Domicilio: text..."
-RE_DOMICILIO = re.compile(
-    r"Domicilio:\s+(.+?)(?=\.\s+Capital:|\.\s+Objeto\s+social:|\.\s+Comienzo|\.\s+Datos|\.\s*$)",
-    re.DOTALL | re.IGNORECASE,
+# Acts only, for blocks with none of the field labels below
+RE_ACT_HEADERS = re.compile(rf"(?P<act>{_ACT_ALTERNATION})\.\s*")
+# Literals every RE_BLOCK_TOKENS field branch must contain
+_FIELD_LABELS = ("capital", "comienzo", "objeto", "domicilio:")
+
+# "Datos registrales" marker and the T/F/S/H references that follow it
+# (both looked up in the lowercased text)
+_DATOS_REGISTRALES = "datos registrales"
+# Possessive tails: the trailing text and the "(date)" group never give back
+# characters, so a near-miss is rejected without re-splitting them.
+RE_REGISTRO = re.compile(
+    r"t\s+\d++\s*,\s*f\s+\d++\s*,\s*s\s+\d++\s*,\s*h\s+[a-z]*+\s*\d++"
+    r"[^.(]*+(?:\([^)]*+\))?",
 )
 
 # Officer: "Adm. Unico: NAME" or "Presidente: NAME"
+# Role keywords (plus the trailing "Datos registrales") are located with one
+# Aho-Corasick pass over the ASCII-lowered act text; every hit bounds the
+# previous officer's name, and RE_CARGO confirms (anchored, on the same
+# lowered text) whether a hit actually opens a role.
+_CARGO_KEYWORDS = (
+    "adm.", "presidente", "vicepresidente", "secretario", "consejero",
+    "liquidador", "auditor", "apoderado", "director", "cons.",
+    "datos registrales",
+)
 RE_CARGO = re.compile(
-    r"(Adm\.\s*(?:Unico|Unica|Solid|Mancom)|Presidente|Vice[Pp]residente|"
-    r"Secretario|Consejero|Liquidador|Auditor(?:\s+de\s+cuentas)?|Apoderado|"
-    r"Director\s+General|Cons\.Del(?:eg)?)\s*[:\.]?\s*(.+?)(?=;|(?:Adm\.\s)|(?:Presidente)|"
-    r"(?:Secretario)|(?:Consejero)|(?:Liquidador)|(?:Auditor)|(?:Apoderado)|"
-    r"(?:Director)|(?:Cons\.)|$)",
-    re.IGNORECASE,
+    r"(adm\.\s*(?:unico|unica|solid|mancom)|presidente|vicepresidente|"
+    r"secretario|consejero|liquidador|auditor(?:\s+de\s+cuentas)?|apoderado|"
+    r"director\s+general|cons\.del(?:eg)?)\s*[:\.]?\s*",
 )
+# Length-preserving lowercase, so automaton offsets index the original text
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _build_cargo_automaton() -> ahocorasick.Automaton:
+    automaton = ahocorasick.Automaton()
+    for kw in _CARGO_KEYWORDS:
+        automaton.add_word(kw, len(kw))
+    automaton.make_automaton()
+    return automaton
 
 
-@dataclass
+_CARGO_AUTOMATON = _build_cargo_automaton()
+
+
+@dataclass(slots=True)
 class ParsedOfficer:
     nombre: str
     cargo: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedAct:
     tipo: str
     texto: str
     officers: list[ParsedOfficer] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedCompany:
     numero: int
     nombre: str
@@ -117,11 +184,27 @@ class ParsedCompany:
     datos_registrales: str | None = None
 
 
+def _extract_text(pdf_path: Path) -> str:
+    """Extract the text layer of a PDF, preferring MuPDF's native extractor."""
+    if pymupdf is not None:
+        try:
+            with pymupdf.open(str(pdf_path)) as doc:
+                # BORME PDFs carry a generated text layer in reading order, so
+                # skip block sorting; ligatures are expanded to plain letters.
+                return "\n".join(
+                    page.get_text("text", sort=False, flags=_MUPDF_TEXT_FLAGS)
+                    for page in doc
+                )
+        except (RuntimeError, ValueError, pymupdf.mupdf.FzErrorBase) as e:
+            logger.warning(f"PyMuPDF failed on {pdf_path}, falling back to pdfminer: {e}")
+    return extract_text(str(pdf_path))
+
+
 def parse_borme_pdf(pdf_path: Path) -> list[ParsedCompany]:
     """Parse a BORME Section A PDF and extract company data."""
     try:
-        text = extract_text(str(pdf_path))
-    except Exception as e:
+        text = _extract_text(pdf_path)
+    except (PSException, OSError, ValueError) as e:
         logger.error(f"Failed to extract text from {pdf_path}: {e}")
         return []
 
@@ -132,6 +215,65 @@ def parse_borme_pdf(pdf_path: Path) -> list[ParsedCompany]:
     return _parse_text(text)
 
 
+# One long-lived pool of parser processes, started by the app lifespan (or on
+# first use in scripts). Workers come from "spawn", never fork: the app
+# process runs an event loop, DB/HTTP connection pools and other threads
+# that a forked child would inherit in an undefined state.
+_parse_pool: ProcessPoolExecutor | None = None
+_parse_pool_lock = threading.Lock()
+
+
+def start_parse_pool(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """Start the PDF parser process pool, or return the one already running."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=max_workers or os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _parse_pool
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the parser processes (app shutdown)."""
+    global _parse_pool
+    with _parse_pool_lock:
+        pool, _parse_pool = _parse_pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def parse_borme_pdfs(pdf_paths: list[Path]) -> dict[Path, list[ParsedCompany]]:
+    """Parse several BORME PDFs in parallel across CPU cores.
+
+    Each PDF is independent and parsing is CPU-bound, so the parser process
+    pool sidesteps the GIL. A PDF that fails to parse maps to an empty list.
+    """
+    global _parse_pool
+    if len(pdf_paths) <= 1:
+        return {p: parse_borme_pdf(p) for p in pdf_paths}
+
+    pool = start_parse_pool()
+    results: dict[Path, list[ParsedCompany]] = {}
+    futures = {p: pool.submit(parse_borme_pdf, p) for p in pdf_paths}
+    for pdf_path, future in futures.items():
+        try:
+            results[pdf_path] = future.result()
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM): parse in-process, and let the next
+            # call start a fresh pool
+            logger.error(f"Parser pool broken, parsing {pdf_path} in-process")
+            with _parse_pool_lock:
+                if _parse_pool is pool:
+                    _parse_pool = None
+            results[pdf_path] = parse_borme_pdf(pdf_path)
+        except Exception:
+            logger.exception(f"Failed to parse {pdf_path}")
+            results[pdf_path] = []
+    return results
+
+
 def _is_false_header(nombre: str) -> bool:
     """Detect false positive company headers.
 
@@ -145,9 +287,7 @@ def _is_false_header(nombre: str) -> bool:
     if nombre.startswith("("):
         return True
     # Fragments of registration reference codes (no 2-letter word = not a name)
-    if not re.search(r"[A-ZÁÉÍÓÚÑa-záéíóúñ]{2}", nombre):
-        return True
-    return False
+    return not RE_NAME_LETTERS.search(nombre)
 
 
 def _parse_text(text: str) -> list[ParsedCompany]:
@@ -172,6 +312,7 @@ def _parse_text(text: str) -> list[ParsedCompany]:
         logger.warning("All headers were false positives")
         return []
 
+    lowered = _lower(text)
     for i, match in enumerate(real_headers):
         numero = int(match.group(1))
         nombre = match.group(2).strip()
@@ -180,10 +321,9 @@ def _parse_text(text: str) -> list[ParsedCompany]:
         # inside the correct company block and their data can be extracted).
         start = match.end()
         end = real_headers[i + 1].start() if i + 1 < len(real_headers) else len(text)
-        block = text[start:end].strip()
 
         company = ParsedCompany(numero=numero, nombre=nombre)
-        _parse_company_block(company, block)
+        _parse_company_block(company, text, start, end, lowered)
         companies.append(company)
 
     logger.info(
@@ -193,88 +333,129 @@ def _parse_text(text: str) -> list[ParsedCompany]:
     return companies
 
 
-def _parse_company_block(company: ParsedCompany, block: str):
-    """Parse a single company's text block to extract acts and data."""
-    # Find all act types in the block
-    act_matches = list(ACT_PATTERN.finditer(block))
+def _lower(text: str) -> str:
+    """Lowercase ``text`` keeping every offset aligned with the original."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters (e.g. "İ") lowercase to two; leave those as they are
+    return "".join(low if len(low := ch.lower()) == 1 else ch for ch in text)
+
+
+def _parse_company_block(
+    company: ParsedCompany, text: str, start: int = 0, end: int | None = None,
+    lowered: str | None = None,
+):
+    """Parse a single company's text block to extract acts and data.
 
-    if not act_matches:
+    The block is ``text[start:end]``. A single ``RE_BLOCK_TOKENS`` sweep
+    over ``lowered`` (``_lower(text)``, computed once per document by the
+    caller) finds act headers and constitution fields; act texts are the
+    spans between consecutive headers. Fields are taken from the first
+    Constitución act when there is one, else from anywhere in the block.
+    """
+    if end is None:
+        end = len(text)
+    if lowered is None:
+        lowered = _lower(text)
+
+    act_heads: list[re.Match] = []
+    const_idx = None
+    const_fields: dict[str, re.Match] = {}
+    block_fields: dict[str, re.Match] = {}
+
+    # Most blocks (appointments, deposits...) carry no constitution field, so
+    # a str.find per label decides whether the field branches are needed
+    if any(lowered.find(label, start, end) != -1 for label in _FIELD_LABELS):
+        tokens = RE_BLOCK_TOKENS
+    else:
+        tokens = RE_ACT_HEADERS
+
+    for m in tokens.finditer(lowered, start, end):
+        kind = m.lastgroup
+        if kind == "act":
+            if const_idx is None and _ACT_INFO[m.group("act")][0] == "Constitución":
+                const_idx = len(act_heads)
+            act_heads.append(m)
+            continue
+        block_fields.setdefault(kind, m)
+        if const_idx is not None and const_idx == len(act_heads) - 1:
+            const_fields.setdefault(kind, m)
+
+    if const_idx is not None:
+        # Constitución fields must lie wholly inside that act's text
+        const_end = act_heads[const_idx + 1].start() if const_idx + 1 < len(act_heads) else end
+        const_fields = {
+            k: m for k, m in const_fields.items()
+            if (m.end(k + "_val") if k in ("obj", "dom") else m.end()) <= const_end
+        }
+
+    if not act_heads:
         # No recognized acts - store the whole block as a generic act
-        company.actos.append(ParsedAct(tipo="Otros conceptos", texto=block))
+        company.actos.append(ParsedAct(tipo="Otros conceptos", texto=text[start:end].strip()))
     else:
-        for i, match in enumerate(act_matches):
-            tipo = match.group(1)
-            start = match.end()
-            end = act_matches[i + 1].start() if i + 1 < len(act_matches) else len(block)
-            act_text = block[start:end].strip()
+        for i, match in enumerate(act_heads):
+            tipo, has_officers = _ACT_INFO[match.group("act")]
+            act_start = match.end()
+            act_end = act_heads[i + 1].start() if i + 1 < len(act_heads) else end
+            act_text = text[act_start:act_end].strip()
 
             act = ParsedAct(tipo=tipo, texto=act_text)
 
             # Extract officers from Nombramientos/Ceses
-            if tipo in ("Nombramientos", "Ceses/Dimisiones", "Reelecciones", "Revocaciones"):
+            if has_officers:
                 act.officers = _extract_officers(act_text)
 
             company.actos.append(act)
 
-    # Extract data from Constitución act if present
-    constitucion_text = None
-    for act in company.actos:
-        if act.tipo == "Constitución":
-            constitucion_text = act.texto
-            break
-
-    # Also try the full block for these fields
-    search_text = constitucion_text or block
-
-    # Capital
-    cap_match = RE_CAPITAL.search(search_text)
-    if cap_match:
-        raw_amount = cap_match.group(1)
-        moneda = cap_match.group(2)
+    # An empty Constitución act falls back to the whole block
+    use_const = const_idx is not None and bool(company.actos[const_idx].texto)
+    fields = const_fields if use_const else block_fields
+
+    m = fields.get("cap")
+    if m:
+        moneda = m.group("cap_mon")
         try:
-            amount = float(raw_amount.replace(".", "").replace(",", "."))
-            company.capital = amount
-            company.capital_moneda = "PTS" if "peseta" in moneda.lower() else "EUR"
+            company.capital = float(m.group("cap_amt").replace(".", "").replace(",", "."))
+            company.capital_moneda = "PTS" if "peseta" in moneda else "EUR"
         except ValueError:
             pass
-
-    # Domicilio
-    dom_match = RE_DOMICILIO.search(search_text)
-    if dom_match:
-        company.domicilio = " ".join(dom_match.group(1).split())
-
-    # Objeto social
-    obj_match = RE_OBJETO.search(search_text)
-    if obj_match:
-        company.objeto_social = " ".join(obj_match.group(1).split())
-
-    # Fecha de inicio
-    fecha_match = RE_FECHA_INICIO.search(search_text)
-    if fecha_match:
-        company.fecha_inicio = fecha_match.group(1)
+    m = fields.get("dom")
+    if m:
+        company.domicilio = " ".join(text[m.start("dom_val"):m.end("dom_val")].split())
+    m = fields.get("obj")
+    if m:
+        company.objeto_social = " ".join(text[m.start("obj_val"):m.end("obj_val")].split())
+    m = fields.get("fec")
+    if m:
+        company.fecha_inicio = m.group("fec_val")
 
     # Datos registrales: T <tomo>, F <folio>, S <sección>, H <hoja>, I/A <inscripción>
-    company.datos_registrales = _extract_datos_registrales(block)
+    company.datos_registrales = _extract_datos_registrales(text, start, end, lowered)
 
 
-def _extract_datos_registrales(text: str) -> str | None:
+def _extract_datos_registrales(
+    text: str, start: int = 0, end: int | None = None, lowered: str | None = None,
+) -> str | None:
     """Extract 'Datos registrales' references from company block.
 
     Captures T (tomo), F (folio), S (sección), H (hoja), I/A (inscripción).
     Multiple sub-entries (multi-province) are joined with '; '.
     """
-    idx = text.lower().find("datos registrales")
-    if idx == -1:
+    if end is None:
+        end = len(text)
+    if lowered is None:
+        lowered = _lower(text)
+    anchor = lowered.find(_DATOS_REGISTRALES, start, end)
+    if anchor == -1:
         return None
-    after = text[idx + len("datos registrales"):].strip().lstrip(".-").strip()
     # Find all T <num>, F <num>, S <num>, H <code> <num> patterns
-    matches = re.findall(
-        r"T\s+\d+\s*,\s*F\s+\d+\s*,\s*S\s+\d+\s*,\s*H\s+[A-Z]*\s*\d+[^.(]*(?:\([^)]*\))?",
-        after,
-        re.IGNORECASE,
-    )
+    matches = [
+        text[m.start():m.end()].strip()
+        for m in RE_REGISTRO.finditer(lowered, anchor + len(_DATOS_REGISTRALES), end)
+    ]
     if matches:
-        return "; ".join(m.strip() for m in matches)
+        return "; ".join(matches)
     return None
 
 
@@ -284,11 +465,39 @@ def _clean_leading_punctuation(s: str) -> str:
 
 
 def _extract_officers(text: str) -> list[ParsedOfficer]:
-    """Extract officer names and roles from appointment/resignation text."""
+    """Extract officer names and roles from appointment/resignation text.
+
+    A role's names run from the role label to the next role keyword (or
+    the end of the act) and are separated by semicolons.
+    """
+    # Keyword starts, longest first on ties; drop hits nested in an earlier one
+    # ("presidente" inside "vicepresidente")
+    lowered = text.translate(_ASCII_LOWER)
+    hits = sorted(
+        (end - length + 1, -length)
+        for end, length in _CARGO_AUTOMATON.iter(lowered)
+    )
+    bounds: list[int] = []
+    covered = 0
+    for start, neg_length in hits:
+        if start >= covered:
+            bounds.append(start)
+            covered = start - neg_length
+
     officers = []
-    for match in RE_CARGO.finditer(text):
-        cargo = match.group(1).strip().rstrip(":")
-        nombre_raw = match.group(2).strip().rstrip(";.").strip()
+    pos = 0
+    for i, start in enumerate(bounds):
+        if start < pos:
+            continue
+        match = RE_CARGO.match(lowered, start)
+        if not match:
+            continue
+        cargo = text[match.start(1):match.end(1)].strip().rstrip(":")
+        # The name needs at least one character, so a keyword right at its
+        # start (e.g. "Auditor: AUDITORES SL") does not end it
+        j = bisect.bisect_right(bounds, match.end(), i + 1)
+        pos = bounds[j] if j < len(bounds) else len(text)
+        nombre_raw = " ".join(text[match.end():pos].split()).rstrip(";.").strip()
         # Clean up multiple names separated by semicolons
         names = [n.strip() for n in nombre_raw.split(";") if n.strip()]
         for name in names:
@@ -314,9 +523,10 @@ def parsed_to_json(companies: list[ParsedCompany]) -> str:
             "actos": [
                 {
                     "tipo": a.tipo,
-                    "officers": [{"nombre": o.nombre, "cargo": o.cargo} for o in a.officers],
+                    # orjson serializes ParsedOfficer (nombre, cargo) natively
+                    "officers": a.officers,
                 }
                 for a in c.actos
             ],
         })
-    return json.dumps(data, ensure_ascii=False)
+    return orjson.dumps(data).decode()
@@ -2,86 +2,163 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
-import random
 import re
-import shlex
+import time
 from collections import Counter
-from typing import Optional
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse
 
-from sqlalchemy import select, func
+from sqlalchemy import func, literal, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from anyascii import anyascii
 from unidecode import unidecode
 
-from app.db.models import Company
+from app.config import settings
+from app.db.models import CIF_MAX_INTENTOS, Company
+from app.services.company_service import companies_changed
+from app.services.http_client import get_scrape_session, scrape_headers
 
 logger = logging.getLogger(__name__)
 
-RATE_LIMIT_DELAY = 2.0  # seconds between requests
+ENRICH_CONCURRENCY = 8  # companies looked up at once in enrich_batch
+MAX_INTENTOS = CIF_MAX_INTENTOS  # lookups per company before it is no longer retried
+MISS_TTL = 3600  # seconds a name that missed every source is skipped
 
-# CIF regex: letra + 7 digitos + control (digito o letra)
-CIF_RE = re.compile(r"\b([ABCDEFGHJKLMNPQRSUVW]\d{7}[0-9A-J])\b")
 
-# Rotación de User-Agents para evitar detección
-_USER_AGENTS = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:124.0) Gecko/20100101 Firefox/124.0",
-    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-]
+class SourceUnavailable(Exception):
+    """A CIF source could not answer (network error, block page or backoff)."""
+
 
+class RecentlyMissed(Exception):
+    """The name missed every source within MISS_TTL; it was not looked up."""
 
-def _random_ua() -> str:
-    return random.choice(_USER_AGENTS)
+# CIF regex: letra + 7 digitos + control (digito o letra)
+CIF_RE = re.compile(r"\b([ABCDEFGHJKLMNPQRSUVW]\d{7}[0-9A-J])\b")
+
+# Trailing legal forms, all of them when stacked ("X SA SL"); longest
+# alternatives first
+_SUFFIX_RE = re.compile(
+    r"(?:\s*\b(?:SLNE|SLL|SLU|SLP|SAU|COOP|SL|SA|SC)\b\.?)+\s*$", re.IGNORECASE,
+)
 
 
+# The same name is cleaned once per scraped page, for every source
+@functools.lru_cache(maxsize=4096)
 def _clean_name(nombre: str) -> str:
     """Remove legal form suffixes for better search results."""
-    cleaned = nombre.strip()
-    for suffix in ["SL", "SLL", "SA", "SLU", "SAU", "SLNE", "SC", "SLP", "COOP"]:
-        cleaned = re.sub(rf"\b{suffix}\b\.?$", "", cleaned, flags=re.IGNORECASE).strip()
-    cleaned = cleaned.rstrip(".,- ")
-    return cleaned
+    return _SUFFIX_RE.sub("", nombre.strip()).strip().rstrip(".,- ")
+
+
+# Sources are queried concurrently; cap in-flight requests per host and
+# space request starts to the same host by settings.enrichment_host_interval
+# seconds. A host that answers 429 or a block page is not requested again for
+# HOST_BACKOFF seconds, doubling on each further block up to HOST_BACKOFF_MAX.
+HOST_CONCURRENCY = 2
+HOST_BACKOFF = 60.0
+HOST_BACKOFF_MAX = 900.0
+_host_semaphores: dict[str, asyncio.Semaphore] = {}
+_host_next_slot: dict[str, float] = {}
+_host_backoff: dict[str, float] = {}
+_host_blocked_until: dict[str, float] = {}
+
+_BLOCK_STATUSES = frozenset({403, 429, 503})
+# Captcha / "unusual traffic" interstitials are small pages; real result
+# pages may embed a reCAPTCHA script, so only short pages are checked
+_BLOCK_MARKERS = ("captcha", "anomaly-modal", "unusual traffic")
+_BLOCK_PAGE_MAX_LEN = 20_000
+
+
+def _host_semaphore(host: str) -> asyncio.Semaphore:
+    sem = _host_semaphores.get(host)
+    if sem is None:
+        sem = _host_semaphores[host] = asyncio.Semaphore(HOST_CONCURRENCY)
+    return sem
+
+
+async def _host_pace(host: str) -> None:
+    """Wait for the next free request slot on a host (token bucket of one)."""
+    now = asyncio.get_running_loop().time()
+    slot = max(now, _host_next_slot.get(host, 0.0))
+    _host_next_slot[host] = slot + settings.enrichment_host_interval
+    if slot > now:
+        await asyncio.sleep(slot - now)
+
+
+def _host_blocked(host: str) -> bool:
+    return asyncio.get_running_loop().time() < _host_blocked_until.get(host, 0.0)
+
+
+def _block_host(host: str, retry_after: str | None = None) -> None:
+    """Back off from a host that rate-limited or blocked us."""
+    backoff = min(_host_backoff.get(host, HOST_BACKOFF / 2) * 2, HOST_BACKOFF_MAX)
+    _host_backoff[host] = backoff
+    if retry_after and retry_after.isdigit():
+        backoff = max(backoff, float(retry_after))
+    _host_blocked_until[host] = asyncio.get_running_loop().time() + backoff
+    logger.warning(f"Blocked by {host}, backing off {backoff:.0f}s")
+
+
+def _is_block_page(status: int, html: str) -> bool:
+    if status in _BLOCK_STATUSES:
+        return True
+    if len(html) > _BLOCK_PAGE_MAX_LEN:
+        return False
+    lower = html.lower()
+    return any(marker in lower for marker in _BLOCK_MARKERS)
+
 
+async def _curl_fetch(url: str, timeout: int = 8) -> str | None:
+    """Fetch URL through curl-impersonate (bypasses TLS fingerprinting).
 
-async def _curl_fetch(url: str, timeout: int = 8) -> Optional[str]:
-    """Fetch URL using curl subprocess (bypasses TLS fingerprinting)."""
+    Returns the page (None if empty). Raises SourceUnavailable when the host
+    could not be asked: request error, block page, or backing off from it.
+    """
+    host = urlparse(url).netloc
+    if _host_blocked(host):
+        raise SourceUnavailable(f"{host} backing off")
     try:
-        cmd = [
-            "curl", "-s", "-L",
-            "--max-time", str(timeout),
-            "-H", f"User-Agent: {_random_ua()}",
-            "-H", "Accept-Language: es-ES,es;q=0.9",
-            url,
-        ]
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout + 5)
-        if proc.returncode == 0 and stdout:
-            return stdout.decode("utf-8", errors="replace")
+        async with _host_semaphore(host):
+            await _host_pace(host)
+            resp = await get_scrape_session().get(
+                url,
+                timeout=timeout,
+                allow_redirects=True,
+                headers=scrape_headers(),
+            )
     except Exception as e:
         logger.debug(f"curl error for {url}: {e}")
-    return None
+        raise SourceUnavailable(f"{host}: {e}") from e
+    html = resp.content.decode("utf-8", errors="replace") if resp.content else ""
+    if _is_block_page(resp.status_code, html):
+        _block_host(host, resp.headers.get("Retry-After"))
+        raise SourceUnavailable(f"{host} blocked (HTTP {resp.status_code})")
+    _host_backoff.pop(host, None)
+    return html or None
 
 
 def _normalize(text: str) -> str:
     """Lowercase + strip accents for fuzzy comparison."""
-    return unidecode(text).lower().strip()
+    return anyascii(text).lower().strip()
+
+
+# Significant words (3+ chars) of normalized text
+_WORD_RE = re.compile(r"[a-z0-9]{3,}")
+
+
+@functools.lru_cache(maxsize=4096)
+def _name_tokens(nombre: str) -> frozenset[str]:
+    """Normalized significant tokens of a company name."""
+    return frozenset(_WORD_RE.findall(_normalize(_clean_name(nombre))))
 
 
 def _name_matches(nombre: str, page_text: str) -> bool:
     """Check if enough tokens from the company name appear in the page."""
-    name_norm = _normalize(_clean_name(nombre))
-    page_norm = _normalize(page_text[:5000])
-    tokens = [t for t in name_norm.split() if len(t) > 2]
+    tokens = _name_tokens(nombre)
     if not tokens:
         return False
-    found = sum(1 for t in tokens if t in page_norm)
-    return found >= len(tokens) * 0.6
+    page_tokens = set(_WORD_RE.findall(_normalize(page_text[:5000])))
+    return len(tokens & page_tokens) >= len(tokens) * 0.6
 
 
 # CNAE regex: "CNAE" + optional "2009:" prefix + 4-digit code
@@ -89,59 +166,96 @@ _CNAE_RE = re.compile(r"CNAE[\s:\-]*(?:20\d{2}[\s:\-]+)?(\d{4})\b")
 # Address patterns
 _ADDR_RE = re.compile(
     r"(?:Domicilio|Dirección|Domicilio Social|Dirección Social|Calle|C/|Avda\.|Avenida|Plaza)"
-    r"[\s:]*([^<\n]{10,120})",
+    r"[\s:]*([^<\n]{10,120}+)",
     re.IGNORECASE,
 )
 # Objeto social
 _OBJ_RE = re.compile(
-    r"(?:Objeto [Ss]ocial|Actividad)[\s:]*([^<\n]{15,300})",
+    r"(?:Objeto [Ss]ocial|Actividad)[\s:]*([^<\n]{15,300}+)",
     re.IGNORECASE,
 )
 
 
-async def _search_ddg(nombre: str) -> Optional[str]:
+def _ddg_cif(html: str) -> str | None:
+    """Pick the CIF from a DuckDuckGo results page.
+
+    The searched company's CIF is repeated across its result snippets, so
+    the scan stops at the first CIF seen twice; otherwise the first one
+    found wins.
+    """
+    seen = set()
+    first = None
+    for m in CIF_RE.finditer(html):
+        cif = m.group(1)
+        if cif in seen:
+            return cif
+        seen.add(cif)
+        if first is None:
+            first = cif
+    return first
+
+
+def _top_cif(html: str) -> str | None:
+    """Most frequent CIF on a directory page, counted in a single pass."""
+    counts = Counter(m.group(1) for m in CIF_RE.finditer(html))
+    return counts.most_common(1)[0][0] if counts else None
+
+
+async def _search_ddg(nombre: str) -> str | None:
     """Search DuckDuckGo HTML for CIF of a company using curl.
 
     Tries two queries: exact name match, then cleaned name with CIF keyword.
+    Raises SourceUnavailable if neither query got an answer.
     """
     queries = [
         f'"{_clean_name_full(nombre)}" CIF',
         f'{_clean_name_full(nombre)} CIF NIF empresa',
     ]
+    answered = False
     for query in queries:
         url = f"https://html.duckduckgo.com/html/?{urlencode({'q': query})}"
         try:
             html = await _curl_fetch(url, timeout=10)
-            if not html:
-                continue
-            cifs = CIF_RE.findall(html)
-            if cifs:
-                counter = Counter(cifs)
-                return counter.most_common(1)[0][0]
-        except Exception as e:
+        except SourceUnavailable as e:
             logger.debug(f"DDG error for '{nombre}': {e}")
+            continue
+        answered = True
+        if not html:
+            continue
+        cif = _ddg_cif(html)
+        if cif:
+            return cif
+        # A full results page about this company with no CIF on it means
+        # the reworded query will miss too
+        if len(html) > 5000 and _name_matches(nombre, html):
+            return None
         await asyncio.sleep(1)
+    if not answered:
+        raise SourceUnavailable(f"DuckDuckGo did not answer for '{nombre}'")
     return None
 
 
+# Every legal form variant, long forms before the abbreviations they contain
+_LEGAL_FORMS_FULL = [
+    "SOCIEDAD LIMITADA UNIPERSONAL", "SOCIEDAD LIMITADA LABORAL",
+    "SOCIEDAD LIMITADA PROFESIONAL", "SOCIEDAD LIMITADA NUEVA EMPRESA",
+    "SOCIEDAD LIMITADA", "SOCIEDAD ANONIMA", "SOCIEDAD COOPERATIVA",
+    "SOCIEDAD COMANDITARIA", "SOCIEDAD COLECTIVA", "COMUNIDAD DE BIENES",
+    "SLU", "SLL", "SLP", "SLNE", "SAU", "SL", "SA", "SC", "SCOOP", "CB",
+]
+# Every trailing form is removed when several are stacked ("X SA SL")
+_SUFFIX_FULL_RE = re.compile(
+    rf"(?:\s*\b(?:{'|'.join(map(re.escape, _LEGAL_FORMS_FULL))})\b\.?)+\s*$", re.IGNORECASE,
+)
+
+
+@functools.lru_cache(maxsize=4096)
 def _clean_name_full(nombre: str) -> str:
     """Remove ALL legal form variants from company name."""
-    cleaned = nombre.strip()
-    # Remove long-form suffixes first, then abbreviations
-    for suffix in [
-        "SOCIEDAD LIMITADA UNIPERSONAL", "SOCIEDAD LIMITADA LABORAL",
-        "SOCIEDAD LIMITADA PROFESIONAL", "SOCIEDAD LIMITADA NUEVA EMPRESA",
-        "SOCIEDAD LIMITADA", "SOCIEDAD ANONIMA", "SOCIEDAD COOPERATIVA",
-        "SOCIEDAD COMANDITARIA", "SOCIEDAD COLECTIVA", "COMUNIDAD DE BIENES",
-        "SLU", "SLL", "SLP", "SLNE", "SAU", "SL", "SA", "SC", "SCOOP", "CB",
-    ]:
-        cleaned = re.sub(
-            rf"\b{re.escape(suffix)}\b\.?\s*$", "", cleaned, flags=re.IGNORECASE
-        ).strip()
-    cleaned = cleaned.rstrip(".,- ")
-    return cleaned
+    return _SUFFIX_FULL_RE.sub("", nombre.strip()).strip().rstrip(".,- ")
 
 
+@functools.lru_cache(maxsize=4096)
 def _slug_from_name(nombre: str) -> str:
     """Convert company name to URL slug for direct lookup."""
     clean = _clean_name_full(nombre)
@@ -151,7 +265,7 @@ def _slug_from_name(nombre: str) -> str:
     return slug
 
 
-async def _search_empresite(nombre: str) -> Optional[dict]:
+async def _search_empresite(nombre: str) -> dict | None:
     """Scrape Empresite (ElEconomista) for company data."""
     slug = _slug_from_name(nombre)
     url = f"https://empresite.eleconomista.es/{slug}.html"
@@ -163,9 +277,9 @@ async def _search_empresite(nombre: str) -> Optional[dict]:
         return None
 
     result = {}
-    cifs = CIF_RE.findall(html)
-    if cifs:
-        result["cif"] = Counter(cifs).most_common(1)[0][0]
+    cif = _top_cif(html)
+    if cif:
+        result["cif"] = cif
 
     cnae_match = _CNAE_RE.search(html)
     if cnae_match:
@@ -186,7 +300,7 @@ async def _search_empresite(nombre: str) -> Optional[dict]:
     return result if result.get("cif") else None
 
 
-async def _search_infoempresa(nombre: str) -> Optional[dict]:
+async def _search_infoempresa(nombre: str) -> dict | None:
     """Scrape Infoempresa for company data."""
     slug = _slug_from_name(nombre).lower()
     url = f"https://www.infoempresa.com/es-es/es/empresa/{slug}"
@@ -198,9 +312,9 @@ async def _search_infoempresa(nombre: str) -> Optional[dict]:
         return None
 
     result = {}
-    cifs = CIF_RE.findall(html)
-    if cifs:
-        result["cif"] = Counter(cifs).most_common(1)[0][0]
+    cif = _top_cif(html)
+    if cif:
+        result["cif"] = cif
 
     cnae_match = _CNAE_RE.search(html)
     if cnae_match:
@@ -209,7 +323,7 @@ async def _search_infoempresa(nombre: str) -> Optional[dict]:
     return result if result.get("cif") else None
 
 
-async def _search_einforma(nombre: str) -> Optional[dict]:
+async def _search_einforma(nombre: str) -> dict | None:
     """Scrape Einforma for company data."""
     slug = _slug_from_name(nombre).lower()
     url = f"https://www.einforma.com/informacion-empresa/{slug}"
@@ -221,9 +335,9 @@ async def _search_einforma(nombre: str) -> Optional[dict]:
         return None
 
     result = {}
-    cifs = CIF_RE.findall(html)
-    if cifs:
-        result["cif"] = Counter(cifs).most_common(1)[0][0]
+    cif = _top_cif(html)
+    if cif:
+        result["cif"] = cif
 
     cnae_match = _CNAE_RE.search(html)
     if cnae_match:
@@ -232,58 +346,133 @@ async def _search_einforma(nombre: str) -> Optional[dict]:
     return result if result.get("cif") else None
 
 
-async def lookup_cif_by_name(nombre: str, **kwargs) -> Optional[str]:
+async def _source_cif(source_fn, nombre: str) -> str | None:
+    """Run one source and return just its CIF (None on a miss)."""
+    result = await source_fn(nombre)
+    if isinstance(result, dict):
+        return result.get("cif")
+    return result
+
+
+# Names that came back empty from every source, with the time of the miss;
+# insertion-ordered so the oldest entry is evicted first
+_MISS_CACHE_SIZE = 10_000
+_recent_misses: dict[str, float] = {}
+
+
+def _recently_missed(nombre: str) -> bool:
+    missed_at = _recent_misses.get(nombre)
+    if missed_at is None:
+        return False
+    if time.monotonic() - missed_at < MISS_TTL:
+        return True
+    del _recent_misses[nombre]
+    return False
+
+
+def _record_miss(nombre: str) -> None:
+    _recent_misses.pop(nombre, None)
+    if len(_recent_misses) >= _MISS_CACHE_SIZE:
+        del _recent_misses[next(iter(_recent_misses))]
+    _recent_misses[nombre] = time.monotonic()
+
+
+async def lookup_cif_by_name(nombre: str, **kwargs) -> str | None:
     """Search free web sources for a company's CIF.
 
-    Tries multiple sources: DuckDuckGo, Empresite, Infoempresa, Einforma.
+    DuckDuckGo goes first: its CIF is corroborated across several results,
+    so it is preferred over any directory page. Only when it finds nothing
+    are Empresite, Infoempresa and Einforma queried, concurrently (each is a
+    different host), with the first CIF found winning and the remaining
+    lookups cancelled. Names that missed on every source within the last
+    MISS_TTL seconds are not looked up again.
+
+    Raises SourceUnavailable when no source could answer at all, so callers
+    can tell an outage from a company with no CIF online, and RecentlyMissed
+    when the lookup was skipped; neither counts as an attempt.
     """
-    # 1. DuckDuckGo (fast, broad)
-    cif = await _search_ddg(nombre)
+    if _recently_missed(nombre):
+        raise RecentlyMissed(nombre)
+    answered = False
+    try:
+        cif = await _source_cif(_search_ddg, nombre)
+        answered = True
+    except SourceUnavailable as e:
+        logger.debug(f"Source error for '{nombre}': {e}")
+        cif = None
     if cif:
         return cif
 
-    # 2. Direct lookup on business directories
-    for source_fn in [_search_empresite, _search_infoempresa, _search_einforma]:
-        try:
-            result = await source_fn(nombre)
-            if result and result.get("cif"):
-                return result["cif"]
-        except Exception as e:
-            logger.debug(f"Source error for '{nombre}': {e}")
-        await asyncio.sleep(1)
-
+    tasks = [
+        asyncio.create_task(_source_cif(source_fn, nombre))
+        for source_fn in (_search_empresite, _search_infoempresa, _search_einforma)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                cif = await next_done
+            except SourceUnavailable as e:
+                logger.debug(f"Source error for '{nombre}': {e}")
+                continue
+            answered = True
+            if cif:
+                return cif
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    # Only a real "no CIF" answer is remembered: errors are retried
+    if not answered:
+        raise SourceUnavailable(f"no CIF source answered for '{nombre}'")
+    _record_miss(nombre)
     return None
 
 
-async def lookup_full_by_name(nombre: str) -> Optional[dict]:
+async def lookup_full_by_name(nombre: str) -> dict | None:
     """Search for CIF + CNAE + address + objeto social.
 
     Returns dict with keys: cif, cnae_code, domicilio, objeto_social (all optional).
+    Raises SourceUnavailable when no source could answer at all.
     """
-    # 1. DuckDuckGo first for quick CIF
-    cif = await _search_ddg(nombre)
+    # DuckDuckGo (quick CIF) and the directories (richer data) are separate
+    # hosts, so they are queried concurrently and merged in priority order.
+    cif, *results = await asyncio.gather(
+        _search_ddg(nombre),
+        _search_empresite(nombre),
+        _search_einforma(nombre),
+        _search_infoempresa(nombre),
+        return_exceptions=True,
+    )
+    if isinstance(cif, Exception) and all(isinstance(r, Exception) for r in results):
+        raise SourceUnavailable(f"no CIF source answered for '{nombre}'")
+    if isinstance(cif, Exception):
+        logger.debug(f"Source error for '{nombre}': {cif}")
+        cif = None
     best = {"cif": cif} if cif else {}
 
-    # 2. Try directories for richer data
-    for source_fn in [_search_empresite, _search_einforma, _search_infoempresa]:
-        try:
-            result = await source_fn(nombre)
-            if result:
-                # Merge: keep first non-None value for each field
-                for key in ("cif", "cnae_code", "domicilio", "objeto_social"):
-                    if result.get(key) and not best.get(key):
-                        best[key] = result[key]
-                if best.get("cif"):
-                    break  # Got CIF + extras, good enough
-        except Exception as e:
-            logger.debug(f"Source error for '{nombre}': {e}")
-        await asyncio.sleep(1)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.debug(f"Source error for '{nombre}': {result}")
+            continue
+        if result:
+            # Merge: keep first non-None value for each field
+            for key in ("cif", "cnae_code", "domicilio", "objeto_social"):
+                if result.get(key) and not best.get(key):
+                    best[key] = result[key]
+            if best.get("cif"):
+                break  # Got CIF + extras, good enough
 
     return best if best.get("cif") else None
 
 
-async def enrich_company_cif(company_id: int, db: AsyncSession) -> Optional[str]:
-    """Lookup and store CIF (+ CNAE, address if available) for a single company."""
+async def enrich_company_cif(
+    company_id: int, db: AsyncSession, *, autocommit: bool = True,
+) -> str | None:
+    """Lookup and store CIF (+ CNAE, address if available) for a single company.
+
+    With ``autocommit=False`` the changes are left in the session so callers
+    enriching several companies can commit them together.
+    """
     company = await db.get(Company, company_id)
     if not company or company.cif:
         return company.cif if company else None
@@ -297,61 +486,109 @@ async def enrich_company_cif(company_id: int, db: AsyncSession) -> Optional[str]
             company.domicilio = result["domicilio"]
         if result.get("objeto_social") and not company.objeto_social:
             company.objeto_social = result["objeto_social"]
-        await db.commit()
+        if autocommit:
+            await db.commit()
+            await companies_changed(db, [company.id])
         logger.info(f"CIF found: {company.nombre} -> {result['cif']}")
         return result["cif"]
 
     return None
 
 
+def cif_pending_conditions() -> list:
+    """WHERE clauses for companies still awaiting CIF enrichment.
+
+    The retry bound is rendered inline rather than bound, so PostgreSQL can
+    match it against the idx_companies_cif_pending partial index even under
+    prepared statements.
+    """
+    return [
+        Company.cif.is_(None),
+        Company.cif_intentos < literal(MAX_INTENTOS, literal_execute=True),
+    ]
+
+
 async def enrich_batch(db: AsyncSession, limit: int = 50) -> dict:
-    """Enrich a batch of companies that don't have CIF."""
-    companies = await db.scalars(
+    """Enrich a batch of companies that don't have CIF.
+
+    Companies already tried MAX_INTENTOS times are skipped; the least-tried
+    ones go first. Names that missed every source within MISS_TTL are passed
+    over without a lookup and without using up one of their attempts.
+    """
+    companies = await db.stream_scalars(
         select(Company)
-        .where(Company.cif.is_(None))
-        .order_by(Company.fecha_ultima_publicacion.desc())
-        .limit(limit)
+        .where(*cif_pending_conditions())
+        .order_by(Company.cif_intentos.asc(), Company.fecha_ultima_publicacion.desc())
+        .limit(limit + len(_recent_misses))
+        .execution_options(yield_per=32)
     )
 
-    stats = {"attempted": 0, "found": 0, "not_found": 0, "errors": 0}
-
-    for company in companies.all():
+    stats = {"attempted": 0, "found": 0, "not_found": 0, "errors": 0, "skipped": 0}
+
+    # Lookups run ENRICH_CONCURRENCY at a time; rate limiting happens per
+    # host in _curl_fetch. Results are applied afterwards, since the
+    # session must not be used concurrently.
+    sem = asyncio.Semaphore(ENRICH_CONCURRENCY)
+
+    async def _lookup(nombre: str) -> str | None:
+        async with sem:
+            return await lookup_cif_by_name(nombre)
+
+    # Lookups start as each page of rows arrives instead of after the
+    # whole result set has been fetched
+    batch, tasks = [], []
+    async for company in companies:
+        if _recently_missed(company.nombre):
+            stats["skipped"] += 1
+            continue
+        batch.append(company)
+        tasks.append(asyncio.create_task(_lookup(company.nombre)))
+        if len(batch) == limit:
+            break
+    await companies.close()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    for company, cif in zip(batch, results):
+        # A name missed moments ago by another company in this batch
+        if isinstance(cif, RecentlyMissed):
+            stats["skipped"] += 1
+            continue
         stats["attempted"] += 1
-        try:
-            cif = await lookup_cif_by_name(company.nombre)
-            if cif:
-                company.cif = cif
-                stats["found"] += 1
-                logger.info(f"CIF: {company.nombre} -> {cif}")
-            else:
-                stats["not_found"] += 1
-        except Exception as e:
-            logger.error(f"CIF enrichment error for {company.nombre}: {e}")
+        # A lookup that errored on every source is not an attempt: it leaves
+        # cif_intentos alone so the company is retried
+        if isinstance(cif, Exception):
+            logger.error(f"CIF enrichment error for {company.nombre}: {cif}")
             stats["errors"] += 1
-
-        await asyncio.sleep(RATE_LIMIT_DELAY)
+        elif cif:
+            company.cif = cif
+            stats["found"] += 1
+            logger.info(f"CIF: {company.nombre} -> {cif}")
+        else:
+            company.cif_intentos = (company.cif_intentos or 0) + 1
+            stats["not_found"] += 1
 
     await db.commit()
+    await companies_changed(db, [c.id for c in batch if c.cif])
     return stats
 
 
 async def count_missing_cif(db: AsyncSession) -> dict:
     """Get stats on CIF coverage."""
-    total = await db.scalar(select(func.count(Company.id)))
-    with_cif = await db.scalar(select(func.count(Company.id)).where(Company.cif.isnot(None)))
-    without_cif = (total or 0) - (with_cif or 0)
+    # COUNT(cif) skips NULLs, so one scan yields both totals
+    total, with_cif = (
+        await db.execute(select(func.count(Company.id), func.count(Company.cif)))
+    ).one()
     return {
-        "total": total or 0,
-        "with_cif": with_cif or 0,
-        "without_cif": without_cif,
-        "coverage_pct": round((with_cif or 0) / total * 100, 1) if total else 0,
+        "total": total,
+        "with_cif": with_cif,
+        "without_cif": total - with_cif,
+        "coverage_pct": round(with_cif / total * 100, 1) if total else 0,
     }
 
 
 async def count_cif_enrichable_filtered(db: AsyncSession, filters: dict) -> int:
     """Count companies matching filters that still need CIF enrichment."""
-    MAX_INTENTOS = 2
-    conditions = [Company.cif.is_(None), Company.cif_intentos < MAX_INTENTOS]
+    conditions = cif_pending_conditions()
     if filters.get("provincia"):
         conditions.append(Company.provincia == filters["provincia"])
     if filters.get("cnae_code"):
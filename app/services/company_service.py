@@ -1,18 +1,35 @@
 from __future__ import annotations
 
 """Company search and CRUD service."""
+import base64
+import json
 import logging
 import math
 import re
-from datetime import datetime, time
-
-from sqlalchemy import func, select, text
+import time as _time
+from collections.abc import AsyncIterator
+from datetime import date, datetime, time
+from functools import lru_cache
+
+import httpx
+from sqlalchemy import (
+    String,
+    bindparam,
+    cast,
+    func,
+    inspect,
+    literal_column,
+    select,
+    text,
+    tuple_,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 
 from app.config import settings
 from app.db.models import Act, Company, Officer
 from app.schemas.search import SearchFilters
+from app.services.fts_service import build_pg_tsquery
 
 # CIF pattern: letter + 7 digits + control (digit or letter)
 _CIF_RE = re.compile(r'^[ABCDEFGHJKLMNPQRSUVW]\d{7}[0-9A-J]$', re.IGNORECASE)
@@ -37,69 +54,62 @@ def _date_to_ts(d) -> int:
     return int(datetime.combine(d, time.min).timestamp())
 
 
-def _build_typesense_filter(filters: SearchFilters) -> str:
-    """Convierte SearchFilters en filter_by de Typesense."""
-    parts: list[str] = []
-
-    if filters.cif:
-        cif_clean = filters.cif.strip().upper()
-        parts.append(f"cif:={cif_clean}")
-
-    if filters.provincia:
-        parts.append(f"provincia:={filters.provincia}")
-
-    if filters.forma_juridica:
-        parts.append(f"forma_juridica:={filters.forma_juridica}")
-
-    if filters.cnae_code:
-        parts.append(f"cnae_code:={filters.cnae_code}")
-
-    if filters.estado:
-        parts.append(f"estado:={filters.estado}")
-
-    if filters.score_min is not None:
-        parts.append(f"score_solvencia:>={filters.score_min}")
-
-    if filters.capital_min is not None:
-        parts.append(f"capital_social:>={filters.capital_min}")
-
-    if filters.capital_max is not None:
-        parts.append(f"capital_social:<={filters.capital_max}")
-
-    if filters.pub_desde:
-        ts = _date_to_ts(filters.pub_desde)
-        parts.append(f"fecha_ultima_publicacion:>={ts}")
-
-    if filters.pub_hasta:
-        ts = _date_to_ts(filters.pub_hasta)
-        parts.append(f"fecha_ultima_publicacion:<={ts}")
+# (SearchFilters field, filter_by fragment) in output order; unset fields
+# (None or "") are skipped
+_TS_FILTER_SPECS = (
+    ("cif", lambda v: f"cif:={v.strip().upper()}"),
+    ("provincia", lambda v: f"provincia:={v}"),
+    ("forma_juridica", lambda v: f"forma_juridica:={v}"),
+    ("cnae_code", lambda v: f"cnae_code:={v}"),
+    ("estado", lambda v: f"estado:={v}"),
+    ("score_min", lambda v: f"score_solvencia:>={v}"),
+    ("capital_min", lambda v: f"capital_social:>={v}"),
+    ("capital_max", lambda v: f"capital_social:<={v}"),
+    ("pub_desde", lambda v: f"fecha_ultima_publicacion:>={_date_to_ts(v)}"),
+    ("pub_hasta", lambda v: f"fecha_ultima_publicacion:<={_date_to_ts(v)}"),
+    ("fecha_desde", lambda v: f"fecha_constitucion:>={_date_to_ts(v)}"),
+    ("fecha_hasta", lambda v: f"fecha_constitucion:<={_date_to_ts(v)}"),
+)
+
+_TS_SORT_FIELDS = frozenset({
+    "nombre",
+    "fecha_constitucion",
+    "fecha_ultima_publicacion",
+    "capital_social",
+    "provincia",
+    "score_solvencia",
+})
 
-    if filters.fecha_desde:
-        ts = _date_to_ts(filters.fecha_desde)
-        parts.append(f"fecha_constitucion:>={ts}")
 
-    if filters.fecha_hasta:
-        ts = _date_to_ts(filters.fecha_hasta)
-        parts.append(f"fecha_constitucion:<={ts}")
-
-    return " && ".join(parts)
+def _build_typesense_filter(filters: SearchFilters) -> str:
+    """Convierte SearchFilters en filter_by de Typesense."""
+    return " && ".join(
+        fmt(v) for name, fmt in _TS_FILTER_SPECS
+        if (v := getattr(filters, name)) is not None and v != ""
+    )
 
 
 def _build_typesense_sort(filters: SearchFilters) -> str:
     """Convierte sort_by/sort_order en sort_by de Typesense."""
-    ts_sort_map = {
-        "nombre": "nombre",
-        "fecha_constitucion": "fecha_constitucion",
-        "fecha_ultima_publicacion": "fecha_ultima_publicacion",
-        "capital_social": "capital_social",
-        "provincia": "provincia",
-        "score_solvencia": "score_solvencia",
-    }
-    field = ts_sort_map.get(filters.sort_by, "fecha_ultima_publicacion")
+    field = filters.sort_by if filters.sort_by in _TS_SORT_FIELDS else "fecha_ultima_publicacion"
     order = "asc" if filters.sort_order == "asc" else "desc"
     return f"{field}:{order}"
 
 
+def _company_from_document(doc: dict) -> Company | None:
+    """Detached Company built from a hit's stored "row" (None if not indexed with it)."""
+    raw = doc.get("row")
+    if not raw:
+        return None
+    row = json.loads(raw)
+    for field in ("fecha_constitucion", "fecha_primera_publicacion", "fecha_ultima_publicacion"):
+        if row.get(field):
+            row[field] = date.fromisoformat(row[field])
+    if row.get("created_at"):
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return Company(**row)
+
+
 async def _search_via_typesense(filters: SearchFilters, db: AsyncSession) -> dict | None:
     """Intenta buscar via Typesense. Retorna None si falla (fallback a DB)."""
     try:
@@ -129,15 +139,18 @@ async def _search_via_typesense(filters: SearchFilters, db: AsyncSession) -> dic
                 "per_page": filters.per_page,
             }
 
-        # Cargar Company objects desde SQLite por los IDs de la pagina
-        hit_ids = [int(h["document"]["id"]) for h in hits]
-        result = await db.scalars(
-            select(Company).where(Company.id.in_(hit_ids))
-        )
-        companies_by_id = {c.id: c for c in result.all()}
+        # Los documentos llevan la fila completa; solo los indexados antes de
+        # guardarla necesitan cargar los Company desde la DB
+        items = [_company_from_document(h["document"]) for h in hits]
+        if None in items:
+            hit_ids = [int(h["document"]["id"]) for h in hits]
+            result = await db.scalars(
+                _with_list_loads(select(Company).where(Company.id.in_(hit_ids)))
+            )
+            companies_by_id = {c.id: c for c in result.all()}
 
-        # Mantener el orden de Typesense
-        items = [companies_by_id[cid] for cid in hit_ids if cid in companies_by_id]
+            # Mantener el orden de Typesense
+            items = [companies_by_id[cid] for cid in hit_ids if cid in companies_by_id]
 
         return {
             "items": items,
@@ -156,94 +169,239 @@ async def _search_via_typesense(filters: SearchFilters, db: AsyncSession) -> dic
 # Database search (PostgreSQL tsvector + LIKE fallback)
 # ---------------------------------------------------------------------------
 
-async def _search_via_db(filters: SearchFilters, db: AsyncSession) -> dict:
-    """Busqueda directa en DB (PostgreSQL FTS + LIKE fallback)."""
-    conditions = []
+# Sort keys that are NOT NULL, so (value, id) gives a total order usable for
+# keyset pagination; the other sort keys page with OFFSET only
+_KEYSET_SORTS = {"nombre", "fecha_ultima_publicacion"}
+
+
+def _encode_cursor(sort_by: str, company: Company) -> str:
+    """Opaque cursor pointing just past `company` in the `sort_by` order."""
+    value = getattr(company, sort_by)
+    if isinstance(value, date):
+        value = value.isoformat()
+    raw = json.dumps([value, company.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(sort_by: str, cursor: str) -> tuple | None:
+    """Inverse of _encode_cursor; None if the cursor is malformed."""
+    try:
+        value, company_id = json.loads(base64.urlsafe_b64decode(cursor))
+        if sort_by == "fecha_ultima_publicacion":
+            value = date.fromisoformat(value)
+        return value, int(company_id)
+    except (ValueError, TypeError):
+        return None
+
+
+# One WHERE clause per filter, each reading its value from a bind parameter
+# named after the filter, so a statement built for a given combination of
+# filters can be cached and reused with any values
+_FILTER_CONDITIONS = {
+    "q_cif": lambda: Company.cif == bindparam("q_cif"),
+    # PostgreSQL: GIN-indexed search_vector (trigger-maintained, see
+    # fts_service) for the name/objeto words, plus the trigram-indexed
+    # substring match on the name and CIF, so partial names still match;
+    # the planner ORs the three index scans in one bitmap
+    "q_fts": lambda: (
+        literal_column("companies.search_vector").bool_op("@@")(
+            func.to_tsquery(literal_column(f"'{settings.pg_fts_config}'::regconfig"), bindparam("q_fts"))
+        )
+        | Company.nombre_normalizado.like(bindparam("q_name_like"))
+        | Company.cif.ilike(bindparam("q_ilike"))
+    ),
+    # LIKE search: nombre_normalizado is already uppercase (q_like is too)
+    "q_like": lambda: (
+        Company.nombre_normalizado.like(bindparam("q_like"))
+        | Company.cif.ilike(bindparam("q_ilike"))
+    ),
+    "cif": lambda: Company.cif == bindparam("cif"),
+    "cif_prefix": lambda: Company.cif.like(bindparam("cif_prefix")),
+    "provincia": lambda: Company.provincia == bindparam("provincia"),
+    "forma_juridica": lambda: Company.forma_juridica == bindparam("forma_juridica"),
+    "cnae_prefix": lambda: Company.cnae_code.like(bindparam("cnae_prefix")),
+    "estado": lambda: Company.estado == bindparam("estado"),
+    "fecha_desde": lambda: Company.fecha_constitucion >= bindparam("fecha_desde"),
+    "fecha_hasta": lambda: Company.fecha_constitucion <= bindparam("fecha_hasta"),
+    "pub_desde": lambda: Company.fecha_ultima_publicacion >= bindparam("pub_desde"),
+    "pub_hasta": lambda: Company.fecha_ultima_publicacion <= bindparam("pub_hasta"),
+    "capital_min": lambda: Company.capital_social >= bindparam("capital_min"),
+    "capital_max": lambda: Company.capital_social <= bindparam("capital_max"),
+    "score_min": lambda: Company.score_solvencia >= bindparam("score_min"),
+    # Semi-join (EXISTS) keeps one row per company without DISTINCT
+    "tipo_acto": lambda: Company.acts.any(Act.tipo_acto == bindparam("tipo_acto")),
+}
+
+_SORT_COLUMNS = {
+    "nombre": Company.nombre,
+    "fecha_constitucion": Company.fecha_constitucion,
+    "fecha_ultima_publicacion": Company.fecha_ultima_publicacion,
+    "capital_social": Company.capital_social,
+    "provincia": Company.provincia,
+    "score_solvencia": Company.score_solvencia,
+}
+
+
+_ESTIMATED_COUNT = text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'companies'::regclass")
+
+
+def _filter_params(filters: SearchFilters, pg: bool = False) -> dict:
+    """Bind values for the filters that are set, keyed like _FILTER_CONDITIONS."""
+    params: dict = {}
 
     if filters.q:
         q_stripped = filters.q.strip()
         q_upper = q_stripped.upper()
-
+        tsquery = build_pg_tsquery(q_stripped) if pg else ""
         # Direct CIF lookup (instant via index)
         if _CIF_RE.match(q_upper):
-            conditions.append(Company.cif == q_upper)
+            params["q_cif"] = q_upper
+        elif tsquery:
+            params["q_fts"] = tsquery
+            params["q_name_like"] = f"%{q_upper}%"
+            params["q_ilike"] = f"%{q_stripped}%"
         else:
-            # LIKE search: matches characters in order, case-insensitive
-            # nombre_normalizado is already uppercase, so compare with q_upper
-            conditions.append(
-                (Company.nombre_normalizado.like(f"%{q_upper}%"))
-                | (Company.cif.ilike(f"%{q_stripped}%"))
-            )
+            params["q_like"] = f"%{q_upper}%"
+            params["q_ilike"] = f"%{q_stripped}%"
 
     if filters.cif:
         cif_clean = filters.cif.strip().upper()
         if len(cif_clean) >= 9:
-            conditions.append(Company.cif == cif_clean)
+            params["cif"] = cif_clean
         else:
-            conditions.append(Company.cif.like(f"{cif_clean}%"))
+            params["cif_prefix"] = f"{cif_clean}%"
 
     if filters.provincia:
-        conditions.append(Company.provincia == filters.provincia)
+        params["provincia"] = filters.provincia
     if filters.forma_juridica:
-        conditions.append(Company.forma_juridica == filters.forma_juridica)
+        params["forma_juridica"] = filters.forma_juridica
     if filters.cnae_code:
-        conditions.append(Company.cnae_code.startswith(filters.cnae_code))
+        params["cnae_prefix"] = f"{filters.cnae_code}%"
     if filters.estado:
-        conditions.append(Company.estado == filters.estado)
-    if filters.fecha_desde:
-        conditions.append(Company.fecha_constitucion >= filters.fecha_desde)
-    if filters.fecha_hasta:
-        conditions.append(Company.fecha_constitucion <= filters.fecha_hasta)
-    if filters.pub_desde:
-        conditions.append(Company.fecha_ultima_publicacion >= filters.pub_desde)
-    if filters.pub_hasta:
-        conditions.append(Company.fecha_ultima_publicacion <= filters.pub_hasta)
-    if filters.capital_min is not None:
-        conditions.append(Company.capital_social >= filters.capital_min)
-    if filters.capital_max is not None:
-        conditions.append(Company.capital_social <= filters.capital_max)
-    if filters.score_min is not None:
-        conditions.append(Company.score_solvencia >= filters.score_min)
-
-    has_join = bool(filters.tipo_acto)
-
-    count_query = select(func.count(func.distinct(Company.id)))
-    if has_join:
-        count_query = count_query.join(Act).where(Act.tipo_acto == filters.tipo_acto)
-    for cond in conditions:
-        count_query = count_query.where(cond)
-    total = await db.scalar(count_query) or 0
-
-    query = select(Company)
-    if has_join:
-        query = query.join(Act).where(Act.tipo_acto == filters.tipo_acto).distinct()
-    for cond in conditions:
-        query = query.where(cond)
-
-    sort_columns = {
-        "nombre": Company.nombre,
-        "fecha_constitucion": Company.fecha_constitucion,
-        "fecha_ultima_publicacion": Company.fecha_ultima_publicacion,
-        "capital_social": Company.capital_social,
-        "provincia": Company.provincia,
-        "score_solvencia": Company.score_solvencia,
-    }
-    sort_col = sort_columns.get(filters.sort_by, Company.fecha_ultima_publicacion)
-    if filters.sort_order == "asc":
-        query = query.order_by(sort_col.asc())
+        params["estado"] = filters.estado
+    for name in ("fecha_desde", "fecha_hasta", "pub_desde", "pub_hasta"):
+        if getattr(filters, name):
+            params[name] = getattr(filters, name)
+    for name in ("capital_min", "capital_max", "score_min"):
+        if getattr(filters, name) is not None:
+            params[name] = getattr(filters, name)
+    if filters.tipo_acto:
+        params["tipo_acto"] = filters.tipo_acto
+    return params
+
+
+def _search_order(sort_key: str, asc: bool) -> tuple:
+    sort_col = _SORT_COLUMNS[sort_key]
+    # id breaks ties so the order is stable across pages
+    return (sort_col.asc(), Company.id.asc()) if asc else (sort_col.desc(), Company.id.desc())
+
+
+def _with_list_loads(query):
+    """Options for queries returning company lists (search, exports).
+
+    List rows are rendered from their columns only: touching ``acts`` or
+    ``officers`` on one would be a lazy load per row (and under asyncio an
+    opaque MissingGreenlet), so every relationship load raises instead.
+    List queries that do need a relationship must eager-load it explicitly.
+    """
+    return query.options(raiseload("*"))
+
+
+@lru_cache(maxsize=256)
+def _search_statements(shape: tuple[str, ...], sort_key: str, asc: bool, seek: bool, with_total: bool = True):
+    """(page, count) statements for one filter shape + ordering, built once.
+
+    Limit, offset and the keyset bounds are bind parameters too, so the
+    statement objects are shared by every search with the same shape.
+    Without ``with_total`` the offset page carries no window count.
+    """
+    conditions = [_FILTER_CONDITIONS[name]() for name in shape]
+    sort_col = _SORT_COLUMNS[sort_key]
+    order_by = _search_order(sort_key, asc)
+
+    if seek:
+        # Keyset page: seek past the cursor instead of scanning OFFSET rows,
+        # and skip the total, which only the first page needs
+        key = tuple_(sort_col, Company.id)
+        after = tuple_(bindparam("_after_key", type_=sort_col.type), bindparam("_after_id", type_=Company.id.type))
+        page = (
+            select(Company)
+            .where(*conditions, key > after if asc else key < after)
+            .order_by(*order_by)
+            .limit(bindparam("_limit"))
+        )
+    elif not with_total:
+        page = (
+            select(Company)
+            .where(*conditions)
+            .order_by(*order_by)
+            .offset(bindparam("_offset"))
+            .limit(bindparam("_limit"))
+        )
     else:
-        query = query.order_by(sort_col.desc())
+        # The total rides along on every page row as a window count, saving
+        # a separate COUNT query per search
+        page = (
+            select(Company, func.count().over().label("_total"))
+            .where(*conditions)
+            .order_by(*order_by)
+            .offset(bindparam("_offset"))
+            .limit(bindparam("_limit"))
+        )
+    count = select(func.count(Company.id)).where(*conditions)
+    return _with_list_loads(page), count
 
-    query = query.offset(filters.offset).limit(filters.per_page)
-    result = await db.scalars(query)
-    items = result.all()
+
+async def _search_via_db(filters: SearchFilters, db: AsyncSession) -> dict:
+    """Busqueda directa en DB (PostgreSQL FTS, LIKE en SQLite o consultas cortas)."""
+    pg = db.bind.dialect.name == "postgresql"
+    params = _filter_params(filters, pg)
+    shape = tuple(name for name in _FILTER_CONDITIONS if name in params)
+
+    sort_key = filters.sort_by if filters.sort_by in _SORT_COLUMNS else "fecha_ultima_publicacion"
+    asc = filters.sort_order == "asc"
+    keyset = sort_key in _KEYSET_SORTS
+    after = _decode_cursor(sort_key, filters.cursor) if keyset and filters.cursor else None
+    # Browsing the whole table: a window count would scan every row just to
+    # report the total, the planner's estimate is close enough
+    estimate = not shape and after is None and settings.search_estimated_total and pg
+    page_query, count_query = _search_statements(shape, sort_key, asc, after is not None, not estimate)
+    params["_limit"] = filters.per_page
+
+    if after is not None:
+        params["_after_key"], params["_after_id"] = after
+        items = (await db.scalars(page_query, params)).all()
+        total = None
+    elif estimate:
+        params["_offset"] = filters.offset
+        items = (await db.scalars(page_query, params)).all()
+        total = await db.scalar(_ESTIMATED_COUNT)
+        if not total or total < 0:
+            # Never analyzed (reltuples is -1 or 0): count for real
+            total = await db.scalar(count_query) or 0
+    else:
+        params["_offset"] = filters.offset
+        rows = (await db.execute(page_query, params)).all()
+        items = [row[0] for row in rows]
+        if rows:
+            total = rows[0]._total
+        elif filters.offset:
+            # Page past the end: no row to carry the window count
+            total = await db.scalar(count_query, params) or 0
+        else:
+            total = 0
+
+    next_cursor = None
+    if keyset and len(items) == filters.per_page:
+        next_cursor = _encode_cursor(sort_key, items[-1])
 
     return {
         "items": items,
         "total": total,
         "page": filters.page,
-        "pages": math.ceil(total / filters.per_page) if total > 0 else 1,
+        "pages": None if total is None else (math.ceil(total / filters.per_page) if total > 0 else 1),
         "per_page": filters.per_page,
+        "next_cursor": next_cursor,
     }
 
 
@@ -251,13 +409,81 @@ async def _search_via_db(filters: SearchFilters, db: AsyncSession) -> dict:
 # Public API
 # ---------------------------------------------------------------------------
 
+# Identical searches (paging back and forth, dashboard refreshes) are answered
+# from a short-lived in-process cache; every writer of companies calls
+# companies_changed() after committing. Items are cached as plain column
+# dicts, never as ORM instances bound to the session that loaded them.
+SEARCH_CACHE_TTL = 60  # seconds
+_SEARCH_CACHE_SIZE = 256
+_search_cache: dict[str, tuple[float, dict]] = {}
+_COMPANY_COLUMNS = tuple(attr.key for attr in inspect(Company).column_attrs)
+
+
+def invalidate_search_cache() -> None:
+    """Drop cached search results (after ingestion or manual edits)."""
+    _search_cache.clear()
+
+
+async def companies_changed(db: AsyncSession, company_ids) -> None:
+    """Propagate committed writes to these companies to the search paths.
+
+    Drops the cached searches and re-indexes the companies in Typesense,
+    whose stored document rows are what search results are rendered from.
+    """
+    invalidate_search_cache()
+    ids = sorted(set(company_ids))
+    if not ids or not settings.typesense_url:
+        return
+    from app.services.typesense_service import index_companies
+    try:
+        stats = await index_companies(db, ids)
+    except httpx.HTTPError as e:
+        logger.warning(f"Typesense re-index of {len(ids)} companies failed: {e}")
+        return
+    if stats["errors"]:
+        logger.warning(f"Typesense re-index: {stats['errors']} of {len(ids)} companies failed")
+
+
+def _search_cache_key(filters: SearchFilters) -> str:
+    q = filters.q.strip().lower() if filters.q else None
+    return filters.model_copy(update={"q": q}).model_dump_json()
+
+
 async def search_companies(filters: SearchFilters, db: AsyncSession) -> dict:
     """Search companies with filters. Returns {items, total, page, pages, per_page}.
 
     Tries Typesense first (fast). Falls back to DB if Typesense is unavailable.
-    The tipo_acto filter (join with Acts) is only supported in the DB path.
+    The tipo_acto filter (join with Acts) and cursor (keyset) pagination are
+    only supported in the DB path; cursor pages return total/pages as None.
+    Results are cached for SEARCH_CACHE_TTL seconds per distinct filter set.
     """
-    use_typesense = bool(settings.typesense_url) and not filters.tipo_acto
+    key = _search_cache_key(filters)
+    now = _time.monotonic()
+    cached = _search_cache.get(key)
+    if cached is not None and now - cached[0] < SEARCH_CACHE_TTL:
+        # Fresh detached instances per hit, like Typesense document rows
+        return {**cached[1], "items": [Company(**row) for row in cached[1]["items"]]}
+
+    result = await _search_uncached(filters, db)
+    if len(_search_cache) >= _SEARCH_CACHE_SIZE:
+        # Insertion-ordered: evict the oldest entry
+        del _search_cache[next(iter(_search_cache))]
+    rows = [{col: getattr(co, col) for col in _COMPANY_COLUMNS} for co in result["items"]]
+    _search_cache[key] = (now, {**result, "items": rows})
+    return result
+
+
+def _is_full_cif(value: str | None) -> bool:
+    return bool(value) and bool(_CIF_RE.match(value.strip().upper()))
+
+
+async def _search_uncached(filters: SearchFilters, db: AsyncSession) -> dict:
+    # A full CIF (as filter or as the query) is a point lookup on the cif
+    # index: cheaper in the DB than a round trip to Typesense
+    use_typesense = (
+        bool(settings.typesense_url) and not filters.tipo_acto and not filters.cursor
+        and not _is_full_cif(filters.cif) and not _is_full_cif(filters.q)
+    )
 
     if use_typesense:
         result = await _search_via_typesense(filters, db)
@@ -269,12 +495,14 @@ async def search_companies(filters: SearchFilters, db: AsyncSession) -> dict:
 
 async def get_company(company_id: int, db: AsyncSession) -> Company | None:
     """Get a single company with its acts and officers."""
+    # Acts ride on the company query as a LEFT JOIN; officers keep their own
+    # SELECT IN, since joining both collections would multiply the rows
     result = await db.execute(
         select(Company)
-        .options(selectinload(Company.acts), selectinload(Company.officers))
+        .options(joinedload(Company.acts), selectinload(Company.officers))
         .where(Company.id == company_id)
     )
-    return result.scalar_one_or_none()
+    return result.unique().scalar_one_or_none()
 
 
 async def get_company_acts(company_id: int, db: AsyncSession) -> list[Act]:
@@ -303,5 +531,39 @@ async def update_company_cif(company_id: int, cif: str | None, db: AsyncSession)
         return None
     company.cif = cif.strip().upper() if cif else None
     await db.commit()
+    await companies_changed(db, [company.id])
     await db.refresh(company)
     return company
+
+
+async def iter_companies(filters: SearchFilters, db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[Company]:
+    """Every company matching `filters`, in search order (exports).
+
+    One statement read through a server-side cursor `batch_size` rows at a
+    time, instead of paging search_companies; pagination fields are ignored.
+    """
+    conditions, params = _filter_conditions(filters, db)
+    sort_key = filters.sort_by if filters.sort_by in _SORT_COLUMNS else "fecha_ultima_publicacion"
+    query = (
+        _with_list_loads(select(Company))
+        .where(*conditions)
+        .order_by(*_search_order(sort_key, filters.sort_order == "asc"))
+        .execution_options(yield_per=batch_size)
+    )
+    async for company in await db.stream_scalars(query, params):
+        yield company
+
+
+async def company_field_lengths(filters: SearchFilters, db: AsyncSession, fields: list[str]) -> list[int]:
+    """Longest text rendering of each field over the companies matching `filters`."""
+    conditions, params = _filter_conditions(filters, db)
+    query = select(
+        *(func.max(func.length(cast(getattr(Company, f), String))) for f in fields)
+    ).where(*conditions)
+    row = (await db.execute(query, params)).one()
+    return [n or 0 for n in row]
+
+
+def _filter_conditions(filters: SearchFilters, db: AsyncSession) -> tuple[list, dict]:
+    params = _filter_params(filters, db.bind.dialect.name == "postgresql")
+    return [_FILTER_CONDITIONS[name]() for name in _FILTER_CONDITIONS if name in params], params
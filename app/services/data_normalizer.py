@@ -20,6 +20,19 @@ logger = logging.getLogger(__name__)
 # Pesetas to EUR conversion (fixed rate since 2002-01-01)
 PTS_TO_EUR = 1 / 166.386
 
+# City right before the province parenthetical: "..., Alcobendas (MADRID)"
+_LOCALIDAD_RE = re.compile(r"[,\s]+([A-ZÁÉÍÓÚÑ][a-záéíóúñ\s]+)\s*\(")
+
+# dd.mm.yy / dd/mm/yyyy (either separator)
+_DATE_RE = re.compile(r"^\s*(\d{1,2})[./](\d{1,2})[./](\d{2}|\d{4})\s*$")
+
+# Act types that change the company state (the latest one in the BORME wins)
+_ESTADO_BY_ACTO = {
+    "Disolución": "disuelta",
+    "Liquidación": "en_liquidacion",
+    "Extinción": "extinguida",
+}
+
 
 def normalize_company(
     parsed: ParsedCompany,
@@ -46,7 +59,7 @@ def normalize_company(
     # Localidad: try to extract city from domicilio before province parenthetical
     localidad = None
     if parsed.domicilio:
-        match = re.search(r"[,\s]+([A-ZÁÉÍÓÚÑ][a-záéíóúñ\s]+)\s*\(", parsed.domicilio)
+        match = _LOCALIDAD_RE.search(parsed.domicilio)
         if match:
             localidad = match.group(1).strip()
 
@@ -63,14 +76,10 @@ def normalize_company(
     fecha_constitucion = _parse_date(parsed.fecha_inicio) if parsed.fecha_inicio else None
 
     # Estado: infer from act types
-    estado = "activa"
-    for act in parsed.actos:
-        if act.tipo == "Disolución":
-            estado = "disuelta"
-        elif act.tipo == "Liquidación":
-            estado = "en_liquidacion"
-        elif act.tipo == "Extinción":
-            estado = "extinguida"
+    estado = next(
+        (_ESTADO_BY_ACTO[act.tipo] for act in reversed(parsed.actos) if act.tipo in _ESTADO_BY_ACTO),
+        "activa",
+    )
 
     return {
         "nombre": nombre,
@@ -96,19 +105,13 @@ def _parse_date(raw: str) -> date | None:
     if not raw:
         return None
 
-    raw = raw.strip().replace("/", ".")
-    parts = raw.split(".")
-    if len(parts) != 3:
+    m = _DATE_RE.match(raw)
+    if not m:
         return None
-
+    day, month, year = map(int, m.groups())
+    if year < 100:
+        year += 2000 if year < 50 else 1900
     try:
-        day = int(parts[0])
-        month = int(parts[1])
-        year = int(parts[2])
-
-        if year < 100:
-            year += 2000 if year < 50 else 1900
-
         return date(year, month, day)
-    except (ValueError, IndexError):
+    except ValueError:
         return None
@@ -2,10 +2,12 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
 import random
 import smtplib
 import string
+import threading
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
@@ -21,8 +23,32 @@ def generate_code(length: int = 8) -> str:
     return "".join(random.choices(alphabet, k=length))
 
 
+# One authenticated SMTP session reused across emails (sends run in executor
+# threads, hence the lock); reopened when the server has dropped it
+_smtp: smtplib.SMTP | None = None
+_smtp_lock = threading.Lock()
+
+
+def _smtp_connect() -> smtplib.SMTP:
+    server = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=10)
+    server.starttls()
+    server.login(settings.smtp_user, settings.smtp_password)
+    return server
+
+
+def close_smtp() -> None:
+    """Close the shared SMTP session (app shutdown)."""
+    global _smtp
+    with _smtp_lock:
+        if _smtp is not None:
+            with contextlib.suppress(smtplib.SMTPException, OSError):
+                _smtp.quit()
+            _smtp = None
+
+
 def _send_smtp(to_email: str, subject: str, html_body: str) -> bool:
     """Send email via SMTP (blocking). Run in executor."""
+    global _smtp
     if not settings.smtp_host:
         logger.warning("SMTP not configured, skipping email to %s", to_email)
         return False
@@ -34,14 +60,21 @@ def _send_smtp(to_email: str, subject: str, html_body: str) -> bool:
     msg.attach(MIMEText(html_body, "html"))
 
     try:
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=10) as server:
-            server.starttls()
-            server.login(settings.smtp_user, settings.smtp_password)
-            server.sendmail(settings.smtp_from, to_email, msg.as_string())
+        with _smtp_lock:
+            if _smtp is None:
+                _smtp = _smtp_connect()
+            try:
+                _smtp.sendmail(settings.smtp_from, to_email, msg.as_string())
+            except smtplib.SMTPServerDisconnected:
+                # Idle session closed by the server: reconnect and retry once
+                _smtp = _smtp_connect()
+                _smtp.sendmail(settings.smtp_from, to_email, msg.as_string())
         logger.info("Email sent to %s", to_email)
         return True
     except Exception:
         logger.exception("Failed to send email to %s", to_email)
+        # Start the next email from a fresh session
+        close_smtp()
         return False
 
 
@@ -1,15 +1,17 @@
 """Integración con ERPs externos (Odoo, webhook genérico).
 
 Permite sincronizar empresas prospectadas con el ERP del usuario:
-- Odoo: XML-RPC (res.partner / crm.lead)
+- Odoo: JSON-RPC (res.partner / crm.lead)
 - Webhook: POST JSON a cualquier endpoint
 """
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import json
 import logging
-import xmlrpc.client
 from datetime import datetime
+from typing import Self
 
 import httpx
 from sqlalchemy import select
@@ -20,6 +22,11 @@ from app.db.models import Company, ERPConnection, ERPSyncLog
 logger = logging.getLogger(__name__)
 
 SPAIN_COUNTRY_ID = 68  # res.country ID para España en Odoo base
+WEBHOOK_CONCURRENCY = 16  # POSTs en vuelo a la vez por push
+
+# Lo que puede lanzar una llamada al ERP: transporte/HTTP, error JSON-RPC de
+# Odoo (RuntimeError), autenticación fallida (ConnectionError) o cuerpo no JSON
+_ERP_ERRORS = (httpx.HTTPError, httpx.InvalidURL, OSError, RuntimeError, ValueError)
 
 DEFAULT_ODOO_MAPPING = {
     "nombre": "name",
@@ -66,21 +73,49 @@ def _build_odoo_partner(company: Company, mapping: dict | None = None) -> dict:
 
 
 class OdooClient:
+    """Odoo external API over JSON-RPC (``/jsonrpc``).
+
+    All calls share one keep-alive httpx.Client; use it as a context manager
+    (or call ``close()``) so the pooled connection is released.
+    """
+
     def __init__(self, url: str, database: str, username: str, api_key: str):
         self.url = url.rstrip("/")
         self.db = database
         self.user = username
         self.key = api_key
         self._uid: int | None = None
-
-    def _common(self):
-        return xmlrpc.client.ServerProxy(f"{self.url}/xmlrpc/2/common")
-
-    def _object(self):
-        return xmlrpc.client.ServerProxy(f"{self.url}/xmlrpc/2/object")
+        self._http = httpx.Client(http2=True, timeout=30.0)
+        self._req_id = 0
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._http.close()
+
+    def _jsonrpc(self, service: str, method: str, *args):
+        self._req_id += 1
+        payload = {
+            "jsonrpc": "2.0", "method": "call", "id": self._req_id,
+            "params": {"service": service, "method": method, "args": list(args)},
+        }
+        r = self._http.post(f"{self.url}/jsonrpc", json=payload)
+        r.raise_for_status()
+        body = r.json()
+        if body.get("error"):
+            err = body["error"]
+            raise RuntimeError((err.get("data") or {}).get("message") or err.get("message") or str(err))
+        return body.get("result")
+
+    def version(self) -> dict:
+        return self._jsonrpc("common", "version")
 
     def authenticate(self) -> int:
-        uid = self._common().authenticate(self.db, self.user, self.key, {})
+        uid = self._jsonrpc("common", "authenticate", self.db, self.user, self.key, {})
         if not uid:
             raise ConnectionError("Autenticación Odoo fallida")
         self._uid = uid
@@ -89,15 +124,21 @@ class OdooClient:
     def execute(self, model: str, method: str, *args, **kwargs):
         if not self._uid:
             self.authenticate()
-        return self._object().execute_kw(self.db, self._uid, self.key, model, method, list(args), kwargs)
+        return self._jsonrpc("object", "execute_kw", self.db, self._uid, self.key, model, method, list(args), kwargs)
 
     def search(self, model: str, domain: list, limit: int = 0) -> list[int]:
         kw = {"limit": limit} if limit else {}
         return self.execute(model, "search", domain, **kw)
 
+    def search_read(self, model: str, domain: list, fields: list[str]) -> list[dict]:
+        return self.execute(model, "search_read", domain, fields=fields)
+
     def create(self, model: str, vals: dict) -> int:
         return self.execute(model, "create", [vals])
 
+    def create_many(self, model: str, vals_list: list[dict]) -> list[int]:
+        return self.execute(model, "create", vals_list)
+
     def write(self, model: str, ids: list[int], vals: dict) -> bool:
         return self.execute(model, "write", ids, vals)
 
@@ -120,11 +161,11 @@ class OdooClient:
 async def test_erp_connection(conn: ERPConnection) -> dict:
     if conn.provider == "odoo":
         try:
-            c = OdooClient(conn.url, conn.database or "", conn.username or "", conn.api_key or "")
-            ver = c._common().version()
-            uid = c.authenticate()
+            with OdooClient(conn.url, conn.database or "", conn.username or "", conn.api_key or "") as c:
+                ver = c.version()
+                uid = c.authenticate()
             return {"ok": True, "message": f"Odoo {ver.get('server_version','?')} (uid={uid})"}
-        except Exception as e:
+        except _ERP_ERRORS as e:
             return {"ok": False, "message": str(e)}
     elif conn.provider == "webhook":
         try:
@@ -134,7 +175,7 @@ async def test_erp_connection(conn: ERPConnection) -> dict:
             async with httpx.AsyncClient(timeout=10.0) as cl:
                 r = await cl.post(conn.url, json={"test": True, "source": "fenix-b2b"}, headers=headers)
             return {"ok": r.status_code < 400, "message": f"HTTP {r.status_code}"}
-        except Exception as e:
+        except _ERP_ERRORS as e:
             return {"ok": False, "message": str(e)}
     return {"ok": False, "message": f"Proveedor no soportado: {conn.provider}"}
 
@@ -152,10 +193,8 @@ async def push_companies_to_erp(
     companies = (await db.scalars(select(Company).where(Company.id.in_(company_ids)))).all()
     mapping = None
     if connection.field_mapping:
-        try:
+        with contextlib.suppress(json.JSONDecodeError):
             mapping = json.loads(connection.field_mapping)
-        except json.JSONDecodeError:
-            pass
 
     try:
         if connection.provider == "odoo":
@@ -171,7 +210,7 @@ async def push_companies_to_erp(
         connection.last_sync_at = datetime.utcnow()
         connection.last_sync_status = "ok"
         connection.last_sync_message = f"{cr} creadas, {up} actualizadas"
-    except Exception as e:
+    except _ERP_ERRORS as e:
         log.status = "error"
         log.error_message = str(e)[:500]
         log.completed_at = datetime.utcnow()
@@ -183,20 +222,76 @@ async def push_companies_to_erp(
     return log
 
 
+def _odoo_name_domain(names: list[str]) -> list:
+    """Domain matching companies whose name contains any of `names` (ilike)."""
+    domain: list = ["|"] * (len(names) - 1)
+    domain += [["name", "ilike", n] for n in names]
+    return [["is_company", "=", True]] + domain
+
+
 def _push_odoo(conn: ERPConnection, companies: list, mapping: dict | None) -> tuple[int, int, int]:
-    client = OdooClient(conn.url, conn.database or "", conn.username or "", conn.api_key or "")
-    client.authenticate()
+    """Upsert companies as res.partner in a handful of round trips.
+
+    Existing partners are resolved with one search_read by VAT and one by name
+    (same rules as OdooClient.upsert_partner), new ones are created with a
+    single multi-record create; only updates go one call per partner.
+    """
+    with OdooClient(conn.url, conn.database or "", conn.username or "", conn.api_key or "") as client:
+        client.authenticate()
+        return _upsert_odoo_partners(client, companies, mapping)
+
+
+def _upsert_odoo_partners(client: OdooClient, companies: list, mapping: dict | None) -> tuple[int, int, int]:
     cr = up = fa = 0
-    for co in companies:
-        try:
-            _, action = client.upsert_partner(co, mapping)
-            if action == "created":
-                cr += 1
-            else:
+    prepared = [(co, _build_odoo_partner(co, mapping)) for co in companies]
+
+    vats = sorted({vals["vat"] for _, vals in prepared if vals.get("vat")})
+    by_vat: dict[str, int] = {}
+    if vats:
+        for p in client.search_read("res.partner", [["vat", "in", vats]], ["id", "vat"]):
+            by_vat.setdefault(p["vat"], p["id"])
+
+    unmatched = [co.nombre for co, vals in prepared if vals.get("vat") not in by_vat and co.nombre]
+    name_partners: list[dict] = []
+    if unmatched:
+        name_partners = client.search_read(
+            "res.partner", _odoo_name_domain(sorted(set(unmatched))), ["id", "name"],
+        )
+
+    to_create: dict[str, tuple] = {}  # keyed by VAT (or name) to merge duplicates
+    for co, vals in prepared:
+        pid = by_vat.get(vals.get("vat"))
+        if not pid and co.nombre:
+            needle = co.nombre.lower()
+            pid = next((p["id"] for p in name_partners if needle in (p["name"] or "").lower()), None)
+        if pid:
+            try:
+                client.write("res.partner", [pid], vals)
                 up += 1
-        except Exception as e:
-            fa += 1
-            logger.warning(f"[ERP/Odoo] {co.nombre}: {e}")
+            except _ERP_ERRORS as e:
+                fa += 1
+                logger.warning(f"[ERP/Odoo] {co.nombre}: {e}")
+            continue
+        key = vals.get("vat") or co.nombre
+        if key in to_create:
+            # Pushed twice in one batch: the later values win, as an update
+            up += 1
+        to_create[key] = (co, vals)
+
+    if to_create:
+        pending = list(to_create.values())
+        try:
+            client.create_many("res.partner", [vals for _, vals in pending])
+            cr += len(pending)
+        except _ERP_ERRORS as e:
+            logger.warning(f"[ERP/Odoo] Batch create failed ({e}), retrying one by one")
+            for co, vals in pending:
+                try:
+                    client.create("res.partner", vals)
+                    cr += 1
+                except _ERP_ERRORS as e:
+                    fa += 1
+                    logger.warning(f"[ERP/Odoo] {co.nombre}: {e}")
     return cr, up, fa
 
 
@@ -205,26 +300,32 @@ async def _push_webhook(conn: ERPConnection, companies: list) -> tuple[int, int,
     headers = {"Content-Type": "application/json"}
     if conn.api_key:
         headers["Authorization"] = f"Bearer {conn.api_key}"
-    async with httpx.AsyncClient(timeout=15.0) as cl:
-        for co in companies:
-            payload = {
-                "source": "fenix-b2b-prospector", "action": "upsert_company",
-                "data": {
-                    "id": co.id, "nombre": co.nombre, "cif": co.cif,
-                    "forma_juridica": co.forma_juridica, "domicilio": co.domicilio,
-                    "provincia": co.provincia, "localidad": co.localidad,
-                    "email": co.email, "telefono": co.telefono, "web": co.web,
-                    "cnae_code": co.cnae_code, "capital_social": co.capital_social,
-                    "estado": co.estado, "score_solvencia": co.score_solvencia,
-                    "fecha_constitucion": str(co.fecha_constitucion) if co.fecha_constitucion else None,
-                },
-            }
-            try:
-                r = await cl.post(conn.url, json=payload, headers=headers)
-                cr += 1 if r.status_code < 400 else 0
-                fa += 1 if r.status_code >= 400 else 0
-            except Exception:
-                fa += 1
+    sem = asyncio.Semaphore(WEBHOOK_CONCURRENCY)
+
+    async def _one(cl: httpx.AsyncClient, co) -> httpx.Response:
+        payload = {
+            "source": "fenix-b2b-prospector", "action": "upsert_company",
+            "data": {
+                "id": co.id, "nombre": co.nombre, "cif": co.cif,
+                "forma_juridica": co.forma_juridica, "domicilio": co.domicilio,
+                "provincia": co.provincia, "localidad": co.localidad,
+                "email": co.email, "telefono": co.telefono, "web": co.web,
+                "cnae_code": co.cnae_code, "capital_social": co.capital_social,
+                "estado": co.estado, "score_solvencia": co.score_solvencia,
+                "fecha_constitucion": str(co.fecha_constitucion) if co.fecha_constitucion else None,
+            },
+        }
+        async with sem:
+            return await cl.post(conn.url, json=payload, headers=headers)
+
+    limits = httpx.Limits(max_connections=2 * WEBHOOK_CONCURRENCY, max_keepalive_connections=2 * WEBHOOK_CONCURRENCY)
+    async with httpx.AsyncClient(timeout=15.0, http2=True, limits=limits) as cl:
+        responses = await asyncio.gather(*(_one(cl, co) for co in companies), return_exceptions=True)
+    for r in responses:
+        if isinstance(r, httpx.Response) and r.status_code < 400:
+            cr += 1
+        else:
+            fa += 1
     return cr, 0, fa
 
 
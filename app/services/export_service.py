@@ -1,17 +1,22 @@
 """Export companies to CSV/Excel."""
+import asyncio
 import csv
 import io
 import logging
+import operator
 from datetime import datetime
 from pathlib import Path
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.db.models import ExportLog
 from app.schemas.search import SearchFilters
-from app.services.company_service import search_companies
+from app.services.company_service import company_field_lengths, iter_companies
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +36,12 @@ EXPORT_FIELDS = [
     ("estado", "Estado"),
 ]
 
+# Rows per DB fetch and per writerows()/worker-thread append batch
+CSV_BATCH_ROWS = 1000
+
+# One C-level call per company instead of a getattr per field
+_ROW_GETTER = operator.attrgetter(*(name for name, _ in EXPORT_FIELDS))
+
 
 async def _increment_export_count(user_id: int | None, db: AsyncSession):
     """Increment user's monthly export counter."""
@@ -53,33 +64,27 @@ async def _increment_export_count(user_id: int | None, db: AsyncSession):
 
 async def export_csv(filters: SearchFilters, db: AsyncSession, user_id: int | None = None) -> Path:
     """Export search results as CSV."""
-    # Get all results (override pagination)
-    filters.per_page = 100
-    filters.page = 1
-    all_items = []
-
-    while True:
-        result = await search_companies(filters, db)
-        all_items.extend(result["items"])
-        if filters.page >= result["pages"]:
-            break
-        filters.page += 1
-
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"export_{timestamp}.csv"
     filepath = settings.export_dir / filename
     settings.export_dir.mkdir(parents=True, exist_ok=True)
 
-    with open(filepath, "w", newline="", encoding="utf-8-sig") as f:
+    # Rows are written as they stream from the DB, a batch per writerows()
+    # call, never all held in memory
+    count = 0
+    with open(filepath, "w", newline="", encoding="utf-8-sig", buffering=1 << 20) as f:
         writer = csv.writer(f, delimiter=";")
         writer.writerow([label for _, label in EXPORT_FIELDS])
 
-        for company in all_items:
-            row = []
-            for field_name, _ in EXPORT_FIELDS:
-                value = getattr(company, field_name, "")
-                row.append(str(value) if value is not None else "")
-            writer.writerow(row)
+        rows: list[list[str]] = []
+        async for company in iter_companies(filters, db, batch_size=CSV_BATCH_ROWS):
+            rows.append(["" if v is None else str(v) for v in _ROW_GETTER(company)])
+            if len(rows) == CSV_BATCH_ROWS:
+                writer.writerows(rows)
+                count += len(rows)
+                rows.clear()
+        writer.writerows(rows)
+        count += len(rows)
 
     # Log export
     log = ExportLog(
@@ -87,76 +92,74 @@ async def export_csv(filters: SearchFilters, db: AsyncSession, user_id: int | No
         filename=filename,
         format="csv",
         filters_applied=filters.model_dump_json(),
-        record_count=len(all_items),
+        record_count=count,
     )
     db.add(log)
     await db.commit()
 
     await _increment_export_count(user_id, db)
 
-    logger.info(f"Exported {len(all_items)} companies to {filename}")
+    logger.info(f"Exported {count} companies to {filename}")
     return filepath
 
 
-async def export_excel(filters: SearchFilters, db: AsyncSession, user_id: int | None = None) -> Path:
-    """Export search results as Excel."""
-    filters.per_page = 100
-    filters.page = 1
-    all_items = []
+def _append_rows(ws, rows: list[list]) -> None:
+    for row in rows:
+        ws.append(row)
 
-    while True:
-        result = await search_companies(filters, db)
-        all_items.extend(result["items"])
-        if filters.page >= result["pages"]:
-            break
-        filters.page += 1
 
+async def export_excel(filters: SearchFilters, db: AsyncSession, user_id: int | None = None) -> Path:
+    """Export search results as Excel."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"export_{timestamp}.xlsx"
     filepath = settings.export_dir / filename
     settings.export_dir.mkdir(parents=True, exist_ok=True)
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Empresas"
+    # Write-only workbook: rows go straight to disk as they stream from the DB
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Empresas")
 
-    # Header row
+    # Column widths must be set before the first row in write-only mode,
+    # so they come from the longest value per field, computed in SQL
     headers = [label for _, label in EXPORT_FIELDS]
-    ws.append(headers)
+    lengths = await company_field_lengths(filters, db, [name for name, _ in EXPORT_FIELDS])
+    for i, (header, length) in enumerate(zip(headers, lengths), start=1):
+        ws.column_dimensions[get_column_letter(i)].width = min(max(len(header), length) + 2, 50)
 
-    # Style header
-    from openpyxl.styles import Font
-    for cell in ws[1]:
+    # Header row
+    header_cells = []
+    for label in headers:
+        cell = WriteOnlyCell(ws, value=label)
         cell.font = Font(bold=True)
-
-    # Data rows
-    for company in all_items:
-        row = []
-        for field_name, _ in EXPORT_FIELDS:
-            value = getattr(company, field_name, "")
-            if value is None:
-                value = ""
-            row.append(value)
-        ws.append(row)
-
-    # Auto-width columns
-    for col in ws.columns:
-        max_length = max(len(str(cell.value or "")) for cell in col)
-        ws.column_dimensions[col[0].column_letter].width = min(max_length + 2, 50)
-
-    wb.save(filepath)
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    # Data rows: appending (cell serialization) and saving are CPU-bound, so
+    # they run in a worker thread a batch at a time, off the event loop
+    count = 0
+    rows: list[list] = []
+    async for company in iter_companies(filters, db, batch_size=CSV_BATCH_ROWS):
+        rows.append(["" if v is None else v for v in _ROW_GETTER(company)])
+        if len(rows) == CSV_BATCH_ROWS:
+            await asyncio.to_thread(_append_rows, ws, rows)
+            count += len(rows)
+            rows = []
+    await asyncio.to_thread(_append_rows, ws, rows)
+    count += len(rows)
+
+    await asyncio.to_thread(wb.save, filepath)
 
     log = ExportLog(
         user_id=user_id,
         filename=filename,
         format="xlsx",
         filters_applied=filters.model_dump_json(),
-        record_count=len(all_items),
+        record_count=count,
     )
     db.add(log)
     await db.commit()
 
     await _increment_export_count(user_id, db)
 
-    logger.info(f"Exported {len(all_items)} companies to {filename}")
+    logger.info(f"Exported {count} companies to {filename}")
     return filepath
@@ -2,8 +2,14 @@
 from __future__ import annotations
 
 import logging
+import re
+from functools import lru_cache
+from types import MappingProxyType
+
 from unidecode import unidecode
 
+from app.utils.text_clean import fold_accents
+
 logger = logging.getLogger(__name__)
 
 # Spanish business synonym groups - searching any term finds all related terms
@@ -47,18 +53,35 @@ SYNONYM_GROUPS = [
     {"pintura", "pintores", "decoracion", "interiorismo", "diseno"},
 ]
 
-# Build lookup: word -> set of synonyms
-_SYNONYM_MAP: dict[str, set[str]] = {}
+_TSQUERY_WORD_RE = re.compile(r"[A-Z0-9]+")
+
+# Build lookup: word -> set of synonyms, plus the ready-made OR fragment of
+# each group for FTS5 MATCH and for tsquery (groups are static)
+_SYNONYM_MAP: dict[str, frozenset[str]] = {}
+_FTS5_FRAGMENTS: dict[str, str] = {}
+_TSQUERY_FRAGMENTS: dict[str, str] = {}
 for group in SYNONYM_GROUPS:
-    normalized = {unidecode(w).upper() for w in group}
+    normalized = frozenset(unidecode(w).upper() for w in group)
+    fts5 = "(" + " OR ".join(f'"{s.lower()}"' for s in normalized) + ")"
+    tsquery = "(" + " | ".join(s.lower().replace(" ", " <-> ") for s in normalized) + ")"
     for word in normalized:
         _SYNONYM_MAP[word] = normalized
+        _FTS5_FRAGMENTS[word] = fts5
+        _TSQUERY_FRAGMENTS[word] = tsquery
+# Read-only from here on (shared by the lru_cached helpers below)
+_SYNONYM_MAP = MappingProxyType(_SYNONYM_MAP)
+
+
+@lru_cache(maxsize=4096)
+def _normalize(query: str) -> tuple[str, tuple[str, ...]]:
+    """Transliterated uppercase query and its words (repeat queries are common)."""
+    q_normalized = fold_accents(query.strip()).upper()
+    return q_normalized, tuple(q_normalized.split())
 
 
 def expand_query(query: str) -> list[str]:
     """Expand a search query with synonyms. Returns list of terms to search."""
-    q_normalized = unidecode(query.strip()).upper()
-    words = q_normalized.split()
+    q_normalized, words = _normalize(query)
 
     expanded = {q_normalized}  # Always include original
 
@@ -75,17 +98,15 @@ def build_fts_match(query: str) -> str:
     Example: "construccion madrid" ->
       '(construccion OR obras OR edificacion OR constructora OR reformas) AND madrid*'
     """
-    q_normalized = unidecode(query.strip()).upper()
-    words = q_normalized.split()
+    q_normalized, words = _normalize(query)
 
     parts = []
     for word in words:
         if len(word) < 2:
             continue
-        if word in _SYNONYM_MAP:
-            synonyms = _SYNONYM_MAP[word]
-            or_terms = " OR ".join(f'"{s.lower()}"' for s in synonyms)
-            parts.append(f"({or_terms})")
+        fragment = _FTS5_FRAGMENTS.get(word)
+        if fragment:
+            parts.append(fragment)
         else:
             parts.append(f"{word.lower()}*")
 
@@ -100,26 +121,26 @@ def build_pg_tsquery(query: str) -> str:
 
     Example: "construccion madrid" ->
       "(construccion | obras | edificacion | constructora | reformas) & madrid:*"
+
+    Returns "" when the query has no word of 2+ characters.
     """
-    q_normalized = unidecode(query.strip()).upper()
-    words = q_normalized.split()
+    q_normalized, _ = _normalize(query)
+    # Only plain word characters: anything else is tsquery syntax (& | ! : ( ) ')
+    words = _TSQUERY_WORD_RE.findall(q_normalized)
 
     parts = []
     for word in words:
         if len(word) < 2:
             continue
-        word_lower = word.lower()
-        if word in _SYNONYM_MAP:
-            synonyms = _SYNONYM_MAP[word]
-            # PostgreSQL OR syntax with |
-            or_expr = " | ".join(s.lower().replace(" ", " <-> ") for s in synonyms)
-            parts.append(f"({or_expr})")
+        fragment = _TSQUERY_FRAGMENTS.get(word)
+        if fragment:
+            parts.append(fragment)
         else:
             # Prefix match for individual words
-            parts.append(f"{word_lower}:*")
+            parts.append(f"{word.lower()}:*")
 
     if not parts:
-        return f"{q_normalized.lower()}:*"
+        return ""
 
     # AND all parts together
     return " & ".join(parts)
@@ -143,6 +164,22 @@ CREATE INDEX IF NOT EXISTS idx_companies_search_vector
 ON companies USING gin(search_vector);
 """
 
+# Trigram indexes serve the '%q%' LIKE/ILIKE filters of the DB search path,
+# which a btree index cannot (leading wildcard)
+CREATE_TRGM_EXTENSION = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+"""
+
+CREATE_NOMBRE_TRGM_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_companies_nombre_trgm
+ON companies USING gin(nombre_normalizado gin_trgm_ops);
+"""
+
+CREATE_CIF_TRGM_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_companies_cif_trgm
+ON companies USING gin(cif gin_trgm_ops);
+"""
+
 CREATE_SEARCH_TRIGGER_FUNCTION = """
 CREATE OR REPLACE FUNCTION companies_search_vector_update() RETURNS trigger AS $$
 BEGIN
@@ -1,8 +1,7 @@
 """Mapeos geográficos (CCAA/provincia) y sectoriales (CPV->CNAE) para oportunidades."""
 from __future__ import annotations
 
-import re
-from typing import Optional
+import ahocorasick
 
 # Provincias por Comunidad Autónoma
 CCAA_PROVINCIAS: dict[str, list[str]] = {
@@ -56,6 +55,33 @@ _CCAA_ORG_KEYWORDS: dict[str, list[str]] = {
     "Melilla": ["ciudad autónoma de melilla", "melilla"],
 }
 
+def _build_automaton(words: list[tuple[str, str]]) -> ahocorasick.Automaton:
+    """Aho-Corasick automaton over lowercase `words` (word, result) pairs.
+
+    Each word carries (priority, result), priority being its position in
+    `words`, so a scan can return the same answer the old ordered
+    `in`-loops did: the first entry, not the first position in the text.
+    """
+    automaton = ahocorasick.Automaton()
+    for priority, (word, result) in enumerate(words):
+        if word not in automaton:
+            automaton.add_word(word, (priority, result))
+    automaton.make_automaton()
+    return automaton
+
+
+def _first_match(automaton: ahocorasick.Automaton, text: str) -> str | None:
+    best = min((payload for _end, payload in automaton.iter(text.lower())), default=None)
+    return best[1] if best else None
+
+
+_PROV_AUTOMATON = _build_automaton(
+    [(p.lower(), p) for provs in CCAA_PROVINCIAS.values() for p in provs]
+)
+_CCAA_AUTOMATON = _build_automaton(
+    [(kw, ccaa) for ccaa, keywords in _CCAA_ORG_KEYWORDS.items() for kw in keywords]
+)
+
 # CPV (2 primeros dígitos) -> CNAE principal
 _CPV_TO_CNAE: dict[str, tuple[str, str]] = {
     "03": ("01", "Agricultura, ganadería, caza"),
@@ -102,41 +128,28 @@ _CPV_TO_CNAE: dict[str, tuple[str, str]] = {
 }
 
 
-def provincia_to_ccaa(provincia: str) -> Optional[str]:
+def provincia_to_ccaa(provincia: str) -> str | None:
     """Obtener CCAA a partir de una provincia."""
     if not provincia:
         return None
     return _PROV_TO_CCAA.get(provincia.lower().strip())
 
 
-def detect_ccaa_from_text(text: str) -> Optional[str]:
+def detect_ccaa_from_text(text: str) -> str | None:
     """Detectar CCAA a partir de un texto (organismo, ámbito, etc.)."""
     if not text:
         return None
-    text_lower = text.lower()
-    for ccaa, keywords in _CCAA_ORG_KEYWORDS.items():
-        for kw in keywords:
-            if kw in text_lower:
-                return ccaa
-    return None
+    return _first_match(_CCAA_AUTOMATON, text)
 
 
-def detect_provincia_from_text(text: str) -> Optional[str]:
+def detect_provincia_from_text(text: str) -> str | None:
     """Detectar provincia a partir de un texto."""
     if not text:
         return None
-    text_lower = text.lower()
-    for prov_lower, _ in _PROV_TO_CCAA.items():
-        if prov_lower in text_lower:
-            # Devolver con capitalización correcta
-            for provs in CCAA_PROVINCIAS.values():
-                for p in provs:
-                    if p.lower() == prov_lower:
-                        return p
-    return None
-
-
-def cpv_to_cnae(cpv_code: str) -> Optional[str]:
+    return _first_match(_PROV_AUTOMATON, text)
+
+
+def cpv_to_cnae(cpv_code: str) -> str | None:
     """Convertir código CPV a CNAE (primeros 2 dígitos)."""
     if not cpv_code:
         return None
@@ -145,7 +158,7 @@ def cpv_to_cnae(cpv_code: str) -> Optional[str]:
     return entry[0] if entry else None
 
 
-def cpv_to_sector(cpv_code: str) -> Optional[str]:
+def cpv_to_sector(cpv_code: str) -> str | None:
     """Obtener descripción del sector a partir de CPV."""
     if not cpv_code:
         return None
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+"""Shared HTTP clients.
+
+One connection pool for the whole app lifetime so repeated requests reuse
+TCP/TLS connections (and HTTP/2 streams) instead of opening a new client per
+call. Both are closed from the app lifespan.
+
+- ``get_client``: httpx client for the BOE/BORME open data APIs.
+- ``get_scrape_session``: curl_cffi session impersonating Chrome's TLS
+  fingerprint, for the enrichment scrapers (sites that block plain clients).
+- ``scrape_headers``: rotating request headers for those scrapers.
+"""
+import itertools
+
+import httpx
+from curl_cffi import requests as curl_requests
+
+# Rotación de User-Agents para evitar detección: ready-made header dicts
+# handed out round-robin (shared, so callers must not mutate them)
+_USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:124.0) Gecko/20100101 Firefox/124.0",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+]
+_SCRAPE_HEADERS = itertools.cycle([
+    {"User-Agent": ua, "Accept-Language": "es-ES,es;q=0.9"} for ua in _USER_AGENTS
+])
+
+_client: httpx.AsyncClient | None = None
+_scrape_session: curl_requests.AsyncSession | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the app-wide AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=50),
+        )
+    return _client
+
+
+def get_scrape_session() -> curl_requests.AsyncSession:
+    """Return the app-wide scraping session, creating it on first use."""
+    global _scrape_session
+    if _scrape_session is None:
+        _scrape_session = curl_requests.AsyncSession(impersonate="chrome124")
+    return _scrape_session
+
+
+def scrape_headers() -> dict[str, str]:
+    """Next scraping header set (User-Agent + Accept-Language) in the ring."""
+    return next(_SCRAPE_HEADERS)
+
+
+async def close_client() -> None:
+    """Close the shared clients (app shutdown)."""
+    global _client, _scrape_session
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _scrape_session is not None:
+        await _scrape_session.close()
+        _scrape_session = None
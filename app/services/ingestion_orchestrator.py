@@ -8,22 +8,22 @@ import asyncio
 import json
 import logging
 from datetime import date, datetime, timedelta
-from typing import Optional
 
-from sqlalchemy import select
+from sqlalchemy import inspect, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.engine import async_session
 from app.db.models import Act, Company, IngestionLog, Officer
 from app.services.borme_fetcher import BormePdfEntry, fetch_sumario
-from app.services.borme_parser import ParsedCompany, parse_borme_pdf
+from app.services.borme_parser import ParsedCompany, parse_borme_pdfs
 from app.services.data_normalizer import normalize_company
 from app.services.pdf_downloader import download_pdfs
 
 logger = logging.getLogger(__name__)
 
 # Global state for tracking current ingestion
-_current_ingestion: Optional[dict] = None
+_current_ingestion: dict | None = None
 
 # Concurrency profiles: off-peak (nights/weekends/holidays) vs normal
 PDF_PARSE_WORKERS = 4
@@ -65,27 +65,12 @@ async def _fetch_and_parse(fecha: date):
     fecha_str = fecha.strftime("%Y%m%d")
     downloaded = await download_pdfs(sumario.pdfs, fecha_str)
 
-    # Parse PDFs in parallel using thread pool (CPU-bound)
-    loop = asyncio.get_running_loop()
-    sem = asyncio.Semaphore(PDF_PARSE_WORKERS)
-
-    async def parse_one(entry, pdf_path):
-        async with sem:
-            parsed = await loop.run_in_executor(None, parse_borme_pdf, pdf_path)
-        return entry, parsed
-
-    parse_results = await asyncio.gather(
-        *[parse_one(e, p) for e, p in downloaded],
-        return_exceptions=True,
-    )
+    # Parse PDFs in parallel across processes (CPU-bound), off the event loop
+    parsed_by_path = await asyncio.to_thread(parse_borme_pdfs, [p for _, p in downloaded])
 
     all_parsed = []
-    for pr in parse_results:
-        if isinstance(pr, Exception):
-            logger.error(f"PDF parse error for {fecha}: {pr}")
-            continue
-        entry, companies = pr
-        for c in companies:
+    for entry, pdf_path in downloaded:
+        for c in parsed_by_path.get(pdf_path, []):
             all_parsed.append((entry, c))
 
     return fecha, sumario, all_parsed
@@ -210,8 +195,26 @@ async def _store_date_results(fecha: date, sumario, all_parsed: list):
             companies_updated = 0
             acts_created = 0
 
-            for entry, parsed in all_parsed:
-                result = await _store_company(db, parsed, entry, fecha)
+            prepared = [
+                (entry, parsed, normalize_company(parsed, entry.provincia, fecha))
+                for entry, parsed in all_parsed
+            ]
+            known = await _existing_companies(db, [n for _, _, n in prepared])
+
+            touched_ids: set[int] = set()
+            skipped = 0
+            for entry, parsed, normalized in prepared:
+                # One savepoint per company: a bad row is skipped and logged
+                # instead of rolling back the whole date
+                try:
+                    async with db.begin_nested():
+                        result = await _store_company(db, parsed, entry, fecha, normalized, known)
+                except SQLAlchemyError as e:
+                    skipped += 1
+                    logger.warning(f"Date {fecha}: skipped company {parsed.nombre!r}: {e}")
+                    await _forget_rolled_back(db, known, normalized)
+                    continue
+                touched_ids.add(result["id"])
                 companies_new += result["new"]
                 companies_updated += result["updated"]
                 acts_created += result["acts"]
@@ -231,6 +234,11 @@ async def _store_date_results(fecha: date, sumario, all_parsed: list):
             log.completed_at = datetime.utcnow()
             await db.commit()
 
+            if touched_ids:
+                # Index just this date's companies instead of waiting for a full resync
+                from app.services.company_service import companies_changed
+                await companies_changed(db, touched_ids)
+
             # Generate alerts for watched companies
             try:
                 from app.services.watchlist_service import generate_alerts_for_date
@@ -243,9 +251,12 @@ async def _store_date_results(fecha: date, sumario, all_parsed: list):
             logger.info(
                 f"Ingested {fecha}: {companies_new} new, "
                 f"{companies_updated} updated, {acts_created} acts"
+                + (f", {skipped} skipped" if skipped else "")
             )
 
         except Exception as e:
+            # The date is stored in one transaction: drop it all, retry later
+            await db.rollback()
             log.status = "failed"
             log.error_message = str(e)[:500]
             log.completed_at = datetime.utcnow()
@@ -259,23 +270,72 @@ async def ingest_single_date(fecha: date):
     await _store_date_results(fecha, sumario, all_parsed)
 
 
+_LOOKUP_CHUNK = 500
+
+
+async def _existing_companies(db: AsyncSession, normalized: list[dict]) -> dict[tuple, Company]:
+    """Companies already stored, keyed by (nombre_normalizado, provincia).
+
+    One query per _LOOKUP_CHUNK keys instead of one per parsed company.
+    """
+    keys = {(n["nombre_normalizado"], n["provincia"]) for n in normalized}
+    with_prov = sorted(k for k in keys if k[1] is not None)
+    without_prov = sorted(k[0] for k in keys if k[1] is None)
+
+    found: dict[tuple, Company] = {}
+    for i in range(0, len(with_prov), _LOOKUP_CHUNK):
+        rows = await db.scalars(
+            select(Company).where(
+                tuple_(Company.nombre_normalizado, Company.provincia).in_(with_prov[i:i + _LOOKUP_CHUNK])
+            )
+        )
+        for co in rows:
+            found.setdefault((co.nombre_normalizado, co.provincia), co)
+    for i in range(0, len(without_prov), _LOOKUP_CHUNK):
+        rows = await db.scalars(
+            select(Company).where(
+                Company.nombre_normalizado.in_(without_prov[i:i + _LOOKUP_CHUNK]),
+                Company.provincia.is_(None),
+            )
+        )
+        for co in rows:
+            found.setdefault((co.nombre_normalizado, None), co)
+    return found
+
+
+async def _forget_rolled_back(db: AsyncSession, known: dict[tuple, Company], normalized: dict) -> None:
+    """Resync `known` after a company's savepoint was rolled back.
+
+    A company inserted in the savepoint is gone; one that already existed
+    was expired by the rollback and is reloaded (no lazy loads under asyncio).
+    """
+    key = (normalized["nombre_normalizado"], normalized["provincia"])
+    company = known.get(key)
+    if company is None:
+        return
+    if inspect(company).persistent:
+        await db.refresh(company)
+    else:
+        del known[key]
+
+
 async def _store_company(
     db: AsyncSession,
     parsed: ParsedCompany,
     entry: BormePdfEntry,
     fecha: date,
+    normalized: dict,
+    known: dict[tuple, Company],
 ) -> dict:
-    """Store a single parsed company and its acts. Returns count of new/updated/acts."""
-    result = {"new": 0, "updated": 0, "acts": 0}
-    normalized = normalize_company(parsed, entry.provincia, fecha)
+    """Store a single parsed company and its acts. Returns count of new/updated/acts
+    plus the company id.
 
-    # Find existing company by normalized name + province
-    existing = await db.scalar(
-        select(Company).where(
-            Company.nombre_normalizado == normalized["nombre_normalizado"],
-            Company.provincia == normalized["provincia"],
-        )
-    )
+    `known` maps (nombre_normalizado, provincia) to stored companies (see
+    _existing_companies); companies created here are added to it.
+    """
+    result = {"new": 0, "updated": 0, "acts": 0}
+    key = (normalized["nombre_normalizado"], normalized["provincia"])
+    existing = known.get(key)
 
     if existing:
         # Update existing company
@@ -302,7 +362,14 @@ async def _store_company(
         company = Company(**normalized)
         db.add(company)
         await db.flush()
+        known[key] = company
         result["new"] = 1
+    # A company created in this run has no stored acts/officers to dedupe
+    # against, but the block itself can repeat an act or an officer
+    check_existing = not result["new"]
+    seen_acts: set[str] = set()
+    seen_officers: set[tuple] = set()
+    result["id"] = company.id
 
     # Store acts
     for parsed_act in parsed.actos:
@@ -310,7 +377,10 @@ async def _store_company(
         if "onstituci" in parsed_act.tipo and not company.fecha_constitucion:
             company.fecha_constitucion = fecha
 
-        existing_act = await db.scalar(
+        if parsed_act.tipo in seen_acts:
+            continue
+        seen_acts.add(parsed_act.tipo)
+        existing_act = check_existing and await db.scalar(
             select(Act.id).where(
                 Act.company_id == company.id,
                 Act.borme_id == entry.id,
@@ -346,7 +416,11 @@ async def _store_company(
             elif parsed_act.tipo == "Reelecciones":
                 tipo_evento = "reeleccion"
 
-            existing_officer = await db.scalar(
+            officer_key = (officer.nombre, officer.cargo, tipo_evento)
+            if officer_key in seen_officers:
+                continue
+            seen_officers.add(officer_key)
+            existing_officer = check_existing and await db.scalar(
                 select(Officer.id).where(
                     Officer.company_id == company.id,
                     Officer.nombre_persona == officer.nombre,
@@ -365,5 +439,4 @@ async def _store_company(
                     act_id=act.id,
                 ))
 
-    await db.commit()
     return result
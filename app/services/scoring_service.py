@@ -17,6 +17,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from app.db.models import Act, Company, JudicialNotice, Officer
+from app.services.company_service import companies_changed
 
 logger = logging.getLogger(__name__)
 
@@ -291,6 +292,7 @@ async def score_company(company_id: int, db: AsyncSession) -> Optional[int]:
     company.score_solvencia = score
     company.score_updated_at = datetime.utcnow()
     await db.commit()
+    await companies_changed(db, [company.id])
 
     logger.info(f"Score: {company.nombre} -> {score}/100")
     return score
@@ -344,6 +346,7 @@ async def score_batch(
             stats["errors"] += 1
 
     await db.commit()
+    await companies_changed(db, [c.id for c in companies])
     return stats
 
 
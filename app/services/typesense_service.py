@@ -11,6 +11,8 @@ from datetime import date, datetime, time
 from typing import Any
 
 import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.db.models import Company
@@ -75,6 +77,25 @@ COLLECTION_SCHEMA: dict[str, Any] = {
 # Company → Typesense document
 # ---------------------------------------------------------------------------
 
+# Columns stored verbatim (NULLs kept) in the unindexed "row" field, so search
+# results can be rendered without a SQL round trip
+ROW_FIELDS = (
+    "id", "nombre", "nombre_normalizado", "cif", "forma_juridica", "domicilio",
+    "provincia", "localidad", "objeto_social", "cnae_code", "capital_social",
+    "fecha_constitucion", "fecha_primera_publicacion", "fecha_ultima_publicacion",
+    "email", "telefono", "web", "estado", "datos_registrales", "score_solvencia",
+    "created_at",
+)
+
+
+def _row_json(c: Company) -> str:
+    row = {}
+    for field in ROW_FIELDS:
+        value = getattr(c, field)
+        row[field] = value.isoformat() if isinstance(value, (date, datetime)) else value
+    return json.dumps(row, ensure_ascii=False)
+
+
 def company_to_document(c: Company) -> dict[str, Any]:
     """Convierte un ORM Company a documento Typesense."""
     return {
@@ -95,6 +116,8 @@ def company_to_document(c: Company) -> dict[str, Any]:
         "email": c.email or "",
         "telefono": c.telefono or "",
         "web": c.web or "",
+        # Not in COLLECTION_SCHEMA: stored with the document but not indexed
+        "row": _row_json(c),
     }
 
 
@@ -141,7 +164,11 @@ async def drop_collection() -> None:
 # ---------------------------------------------------------------------------
 
 async def upsert_documents(docs: list[dict[str, Any]], batch_size: int = 200) -> dict[str, int]:
-    """Importa documentos en batch usando JSONL. Retorna {success, errors}."""
+    """Importa documentos en batch usando JSONL. Retorna {success, errors}.
+
+    Cada request lleva `batch_size` documentos, que Typesense también usa
+    como tamaño de lote al indexar en el servidor.
+    """
     col = settings.typesense_collection
     stats = {"success": 0, "errors": 0}
 
@@ -154,7 +181,7 @@ async def upsert_documents(docs: list[dict[str, Any]], batch_size: int = 200) ->
             resp = await client.post(
                 _url(f"/collections/{col}/documents/import"),
                 headers={**_headers(), "Content-Type": "text/plain"},
-                params={"action": "upsert"},
+                params={"action": "upsert", "batch_size": batch_size},
                 content=jsonl,
             )
             resp.raise_for_status()
@@ -171,6 +198,25 @@ async def upsert_documents(docs: list[dict[str, Any]], batch_size: int = 200) ->
     return stats
 
 
+INDEX_BATCH_SIZE = 1000
+
+
+async def index_companies(db: AsyncSession, company_ids: list[int]) -> dict[str, int]:
+    """Upsert the given companies into the collection (incremental indexing).
+
+    Rows are re-read from the DB in INDEX_BATCH_SIZE chunks so server-side
+    defaults (created_at) are loaded. Retorna {success, errors}.
+    """
+    stats = {"success": 0, "errors": 0}
+    for i in range(0, len(company_ids), INDEX_BATCH_SIZE):
+        chunk = company_ids[i : i + INDEX_BATCH_SIZE]
+        companies = (await db.scalars(select(Company).where(Company.id.in_(chunk)))).all()
+        batch = await upsert_documents([company_to_document(c) for c in companies], batch_size=INDEX_BATCH_SIZE)
+        stats["success"] += batch["success"]
+        stats["errors"] += batch["errors"]
+    return stats
+
+
 # ---------------------------------------------------------------------------
 # Search
 # ---------------------------------------------------------------------------
@@ -182,9 +228,12 @@ async def search_typesense(
     sort_by: str = "fecha_ultima_publicacion:desc",
     page: int = 1,
     per_page: int = 25,
+    cache_ttl: int = 60,
 ) -> dict[str, Any]:
     """Busca en Typesense. Retorna la respuesta cruda de la API.
 
+    Typesense cachea el resultado cache_ttl segundos (0 desactiva la cache).
+
     Claves utiles del resultado:
       - found: total de resultados
       - hits: lista de {document, highlights, text_match}
@@ -201,6 +250,9 @@ async def search_typesense(
     }
     if filter_by:
         params["filter_by"] = filter_by
+    if cache_ttl:
+        params["use_cache"] = "true"
+        params["cache_ttl"] = cache_ttl
 
     async with httpx.AsyncClient(timeout=10) as client:
         resp = await client.get(
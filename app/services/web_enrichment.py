@@ -21,12 +21,15 @@ from typing import Optional
 from urllib.parse import urljoin, urlparse, urlencode
 
 import httpx
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from anyascii import anyascii
 from unidecode import unidecode
 
 from app.db.models import Company
+from app.services.company_service import companies_changed
+from app.services.http_client import get_scrape_session, scrape_headers
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +56,11 @@ LEGAL_FORMS = re.compile(
 
 # Sufijos de formas juridicas para limpiar queries de busqueda
 _LEGAL_SUFFIXES = ["SL", "SLL", "SA", "SLU", "SAU", "SLNE", "SC", "SLP", "COOP", "CB"]
+# Every trailing suffix is removed when several are stacked ("X SA SL")
+_LEGAL_SUFFIX_RE = re.compile(
+    rf"(?:\s*\b(?:{'|'.join(sorted(_LEGAL_SUFFIXES, key=len, reverse=True))})\b\.?)+$",
+    re.IGNORECASE,
+)
 
 # Dominios a descartar en resultados de busqueda
 SKIP_DOMAINS = {
@@ -91,13 +99,6 @@ LEGAL_PATHS = [
     "imprint", "impressum",
 ]
 
-_USER_AGENTS = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:124.0) Gecko/20100101 Firefox/124.0",
-    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-]
-
 
 # --- Name helpers ---
 
@@ -112,11 +113,7 @@ def _normalize_name(name: str) -> str:
 
 def _clean_search_name(nombre: str) -> str:
     """Remove legal form suffixes for cleaner search queries."""
-    cleaned = nombre.strip()
-    for suffix in _LEGAL_SUFFIXES:
-        cleaned = re.sub(rf"\b{suffix}\b\.?$", "", cleaned, flags=re.IGNORECASE).strip()
-    cleaned = cleaned.rstrip(".,- ")
-    return cleaned
+    return _LEGAL_SUFFIX_RE.sub("", nombre.strip()).strip().rstrip(".,- ")
 
 
 def _names_match_flexible(borme_name: str, page_text_upper: str) -> bool:
@@ -182,20 +179,26 @@ def _extract_phones_text(text: str) -> list[str]:
     return phones
 
 
-def _extract_from_html(html: str) -> tuple[list[str], list[str]]:
-    """Extract emails and phones from HTML: text + attributes + structured data."""
-    soup = BeautifulSoup(html, "html.parser")
+def _visible_text(tree: LexborHTMLParser) -> str:
+    """Page text without script/style bodies; the parsed tree is left intact."""
+    clean = tree.clone()
+    clean.strip_tags(["script", "style", "template"])
+    return clean.text(separator=" ", strip=True, skip_empty=True)
+
+
+def _extract_from_html(tree: LexborHTMLParser) -> tuple[list[str], list[str]]:
+    """Extract emails and phones from a parsed page: text + attributes + structured data."""
     emails: list[str] = []
     phones: list[str] = []
 
     # 1. From text content
-    text = soup.get_text(separator=" ", strip=True)
+    text = _visible_text(tree)
     emails.extend(_extract_emails_text(text))
     phones.extend(_extract_phones_text(text))
 
     # 2. From mailto: and tel: links
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
+    for a in tree.css("a[href]"):
+        href = a.attributes.get("href") or ""
         if href.startswith("mailto:"):
             email = href.replace("mailto:", "").split("?")[0].strip()
             if EMAIL_RE.match(email) and email not in emails:
@@ -209,17 +212,17 @@ def _extract_from_html(html: str) -> tuple[list[str], list[str]]:
                 phones.append(digits)
 
     # 3. From meta tags
-    for meta in soup.find_all("meta"):
-        content = meta.get("content", "")
+    for meta in tree.css("meta"):
+        content = meta.attributes.get("content") or ""
         if "@" in content:
             for match in EMAIL_RE.findall(content):
                 if match not in emails:
                     emails.append(match)
 
     # 4. From JSON-LD structured data
-    for script in soup.find_all("script", type="application/ld+json"):
+    for script in tree.css('script[type="application/ld+json"]'):
         try:
-            data = _json.loads(script.string or "")
+            data = _json.loads(script.text())
             _extract_from_jsonld(data, emails, phones)
         except (_json.JSONDecodeError, TypeError):
             pass
@@ -279,24 +282,16 @@ def _filter_emails(emails: list[str], company_domain: str | None = None) -> list
 # --- HTTP / Search ---
 
 async def _curl_fetch(url: str, timeout: int = 10) -> Optional[str]:
-    """Fetch URL using curl subprocess (bypasses TLS fingerprinting)."""
+    """Fetch URL through curl-impersonate (bypasses TLS fingerprinting)."""
     try:
-        ua = random.choice(_USER_AGENTS)
-        cmd = [
-            "curl", "-s", "-L",
-            "--max-time", str(timeout),
-            "-H", f"User-Agent: {ua}",
-            "-H", "Accept-Language: es-ES,es;q=0.9",
+        resp = await get_scrape_session().get(
             url,
-        ]
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+            timeout=timeout,
+            allow_redirects=True,
+            headers=scrape_headers(),
         )
-        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout + 5)
-        if proc.returncode == 0 and stdout:
-            return stdout.decode("utf-8", errors="replace")
+        if resp.content:
+            return resp.content.decode("utf-8", errors="replace")
     except Exception as e:
         logger.debug(f"curl error for {url}: {e}")
     return None
@@ -310,16 +305,16 @@ async def _search_ddg(query: str) -> list[str]:
         if not html:
             return []
 
-        soup = BeautifulSoup(html, "html.parser")
+        tree = LexborHTMLParser(html)
         urls = []
-        for a in soup.find_all("a", class_="result__a", href=True):
-            href = a["href"]
+        for a in tree.css("a.result__a[href]"):
+            href = a.attributes.get("href") or ""
             if href.startswith("http") and "duckduckgo.com" not in href:
                 if href not in urls:
                     urls.append(href)
         if not urls:
-            for a in soup.find_all("a", href=True):
-                href = a["href"]
+            for a in tree.css("a[href]"):
+                href = a.attributes.get("href") or ""
                 if href.startswith("http") and "duckduckgo.com" not in href and "search" not in href[:30]:
                     if href not in urls:
                         urls.append(href)
@@ -373,7 +368,7 @@ async def _fetch_page(url: str, client: httpx.AsyncClient = None) -> Optional[st
         try:
             resp = await client.get(
                 url,
-                headers={"User-Agent": random.choice(_USER_AGENTS)},
+                headers=scrape_headers(),
                 follow_redirects=True,
                 timeout=10.0,
             )
@@ -385,17 +380,17 @@ async def _fetch_page(url: str, client: httpx.AsyncClient = None) -> Optional[st
     return None
 
 
-def _find_legal_links(html: str, base_url: str) -> list[str]:
+def _find_legal_links(tree: LexborHTMLParser, base_url: str) -> list[str]:
     """Find links to legal/privacy/contact pages, prioritizing contact."""
-    soup = BeautifulSoup(html, "html.parser")
     contact_urls: list[str] = []
     other_urls: list[str] = []
 
     contact_keywords = {"contacto", "contact", "contacta", "about", "quienes-somos", "sobre-nosotros", "empresa"}
 
-    for a in soup.find_all("a", href=True):
-        href = a["href"].lower()
-        text = a.get_text(strip=True).lower()
+    for a in tree.css("a[href]"):
+        raw_href = a.attributes.get("href") or ""
+        href = raw_href.lower()
+        text = a.text(strip=True).lower()
 
         is_legal = any(path in href for path in LEGAL_PATHS) or any(
             kw in text
@@ -406,7 +401,7 @@ def _find_legal_links(html: str, base_url: str) -> list[str]:
             ]
         )
         if is_legal:
-            full_url = urljoin(base_url, a["href"])
+            full_url = urljoin(base_url, raw_href)
             is_contact = any(kw in href or kw in text for kw in contact_keywords)
             if is_contact and full_url not in contact_urls:
                 contact_urls.append(full_url)
@@ -444,46 +439,46 @@ async def enrich_company_web(
         return result
 
     # 2. Try up to 3 corporate URLs with flexible name matching
+    # Each page is parsed once; the homepage tree is reused for links and extraction
     corporate_url = None
-    homepage_html = None
+    homepage = None
 
     for candidate_url in search_urls[:3]:
         html = await _fetch_page(candidate_url, client)
         if not html:
             continue
-        page_text_upper = unidecode(
-            BeautifulSoup(html, "html.parser").get_text(separator=" ", strip=True)
-        ).upper()
+        tree = LexborHTMLParser(html)
+        page_text_upper = anyascii(_visible_text(tree)).upper()
         if _names_match_flexible(nombre, page_text_upper):
             corporate_url = candidate_url
-            homepage_html = html
+            homepage = tree
             break
         await asyncio.sleep(0.3)
 
-    if not corporate_url or not homepage_html:
+    if not corporate_url or homepage is None:
         return result
 
     # Web confirmed as belonging to the company
     result["web"] = corporate_url
     company_domain = urlparse(corporate_url).netloc.lower().replace("www.", "")
 
-    # Collect all HTML pages to analyze
-    all_htmls = [homepage_html]
+    # Collect all pages to analyze
+    all_pages = [homepage]
 
     # 3. Find and fetch contact/legal pages (up to 5, prioritizing contacto)
-    legal_links = _find_legal_links(homepage_html, corporate_url)
+    legal_links = _find_legal_links(homepage, corporate_url)
     for link in legal_links:
         legal_html = await _fetch_page(link, client)
         if legal_html:
-            all_htmls.append(legal_html)
+            all_pages.append(LexborHTMLParser(legal_html))
         await asyncio.sleep(0.3)
 
     # 4. Extract email and phone from all pages (text + HTML attributes + JSON-LD)
     all_emails: list[str] = []
     all_phones: list[str] = []
 
-    for html in all_htmls:
-        page_emails, page_phones = _extract_from_html(html)
+    for page in all_pages:
+        page_emails, page_phones = _extract_from_html(page)
         all_emails.extend(e for e in page_emails if e not in all_emails)
         all_phones.extend(p for p in page_phones if p not in all_phones)
 
@@ -556,6 +551,7 @@ async def enrich_batch_web(
             await asyncio.sleep(3)
 
     await db.commit()
+    await companies_changed(db, [c.id for c in companies])
     return stats
 
 
@@ -579,6 +575,7 @@ async def enrich_single_web(
         company.telefono = result["telefono"]
 
     await db.commit()
+    await companies_changed(db, [company.id])
     return result
 
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from pathlib import Path
 
 _DATA_FILE = Path(__file__).resolve().parent.parent.parent / "data" / "provinces.json"
@@ -26,6 +27,7 @@ def get_province_names() -> list[str]:
 _BORME_PROVINCE_MAP: dict[str, str] | None = None
 
 
+@lru_cache(maxsize=512)
 def normalize_province(raw: str) -> str | None:
     """Match a raw province string from BORME to a canonical name."""
     global _BORME_PROVINCE_MAP
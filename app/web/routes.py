@@ -20,7 +20,7 @@ from app.config import settings
 from app.db.engine import get_db
 from app.schemas.opportunity import OpportunityFilters
 from app.schemas.search import SearchFilters
-from app.services.company_service import get_company, search_companies
+from app.services.company_service import companies_changed, get_company, search_companies
 from app.services.ingestion_orchestrator import get_ingestion_status
 from app.services.opportunity_service import cross_search, search_judicial, search_subsidies, search_tenders
 from app.services.watchlist_service import count_unread_alerts, get_act_type_watches, get_alerts, get_watchlist, is_watched
@@ -452,6 +452,7 @@ async def company_detail(
             company.cnae_code = inferred
             company.cnae_inferred = True
             await db.commit()
+            await companies_changed(db, [company.id])
             await db.refresh(company)
 
     watched = await is_watched(company_id, db, user_id=user_id)
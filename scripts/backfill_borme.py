@@ -7,7 +7,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from app.config import settings
-from app.services.ingestion_orchestrator import ingest_date_range
+from app.services.borme_parser import shutdown_parse_pool, start_parse_pool
+from app.services.ingestion_orchestrator import PDF_PARSE_WORKERS, ingest_date_range
 
 
 async def main():
@@ -32,7 +33,11 @@ async def main():
     from app.db.seed_cnae import seed_all
     await seed_all()
 
-    await ingest_date_range(desde, hasta)
+    start_parse_pool(PDF_PARSE_WORKERS)
+    try:
+        await ingest_date_range(desde, hasta)
+    finally:
+        shutdown_parse_pool()
     print("Backfill complete.")
 
 
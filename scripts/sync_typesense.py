@@ -93,23 +93,25 @@ async def main() -> None:
             print("Nada que sincronizar.")
             return
 
-        # Stream en batches
+        # Stream en batches (seek por id: sin OFFSET que recorrer)
         t0 = time.monotonic()
         offset = 0
+        last_id = 0
         synced = 0
         errors = 0
         batch_size = args.batch_size
 
         while offset < total:
-            batch_query = query.order_by(Company.id).offset(offset).limit(batch_size)
+            batch_query = query.where(Company.id > last_id).order_by(Company.id).limit(batch_size)
             result = await db.scalars(batch_query)
             companies = result.all()
 
             if not companies:
                 break
+            last_id = companies[-1].id
 
             docs = [company_to_document(c) for c in companies]
-            stats = await upsert_documents(docs, batch_size=200)
+            stats = await upsert_documents(docs, batch_size=batch_size)
             synced += stats["success"]
             errors += stats["errors"]
             offset += len(companies)
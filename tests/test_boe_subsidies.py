@@ -0,0 +1,41 @@
+"""Tests for BOE subsidies sumario parsing."""
+from datetime import date
+
+from app.services.boe_subsidies_fetcher import DETAIL_MIN_CONFIDENCE, _parse_subsidies_from_sumario
+
+SUMARIO = """<?xml version="1.0" encoding="UTF-8"?>
+<response><data><sumario><diario>
+<seccion codigo="3">
+  <departamento nombre="MINISTERIO DE INDUSTRIA">
+    <epigrafe nombre="Ayudas">
+      <item><identificador>BOE-A-1</identificador><titulo>Resolución por la que se convocan ayudas para pymes</titulo><url_pdf>/a.pdf</url_pdf></item>
+      <item><identificador>BOE-A-2</identificador><titulo>Convocatoria de junta general de subvenciones</titulo></item>
+    </epigrafe>
+  </departamento>
+</seccion>
+<seccion codigo="5A">
+  <departamento nombre="OTRO"><item><identificador>BOE-B-9</identificador><titulo>Ayudas</titulo></item></departamento>
+</seccion>
+<seccion codigo="5B">
+  <departamento nombre="JUNTA DE ANDALUCIA">
+    <item><identificador>BOE-B-4</identificador><titulo>Extracto de subvenciones a la energía solar</titulo></item>
+  </departamento>
+</seccion>
+</diario></sumario></data></response>
+""".encode()
+
+
+def test_parse_subsidies_from_sumario():
+    items = _parse_subsidies_from_sumario(date(2025, 1, 2), SUMARIO)
+    assert [i["boe_id"] for i in items] == ["BOE-A-1", "BOE-B-4"]
+    assert items[0]["organismo"] == "MINISTERIO DE INDUSTRIA"
+    assert items[0]["sector"] == "Ayudas"
+    assert items[0]["url_pdf"] == "/a.pdf"
+    assert items[1]["organismo"] == "JUNTA DE ANDALUCIA"
+    assert items[1]["sector"] is None
+    assert items[0]["confidence"] == 1
+
+
+def test_single_keyword_title_gets_detail():
+    items = _parse_subsidies_from_sumario(date(2025, 1, 2), SUMARIO)
+    assert all(i["confidence"] >= DETAIL_MIN_CONFIDENCE for i in items)
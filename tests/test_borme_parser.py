@@ -0,0 +1,48 @@
+"""Tests for BORME text parsing."""
+from app.services.borme_parser import _extract_officers, _parse_text
+
+SAMPLE = """BORME
+MADRID
+100000 - EJEMPLO TECNOLOGIAS SL.
+Constitución. Comienzo de operaciones: 15.01.25. Objeto social: Desarrollo de software y
+servicios TIC. Domicilio: C/ MAYOR 1 (MADRID). Capital: 3.000,00 Euros. Nombramientos.
+Adm. Unico: PEREZ GARCIA JUAN. Datos registrales. T 12345 , F 10, S 8, H M 123456, I/A 1 (20.01.25).
+100001 - CAPITAL PESETAS SA.
+Constitución. Objeto social: Venta. Domicilio: PLAZA 1 (BILBAO). Capital suscrito: 1.000.000 Pesetas.
+"""
+
+
+def test_parse_constitucion_fields():
+    companies = _parse_text(SAMPLE)
+    assert [c.nombre for c in companies] == ["EJEMPLO TECNOLOGIAS SL", "CAPITAL PESETAS SA"]
+
+    c = companies[0]
+    assert [a.tipo for a in c.actos] == ["Constitución", "Nombramientos"]
+    assert c.capital == 3000.0
+    assert c.capital_moneda == "EUR"
+    assert c.domicilio == "C/ MAYOR 1 (MADRID)"
+    assert c.objeto_social == "Desarrollo de software y servicios TIC"
+    assert c.fecha_inicio == "15.01.25"
+    assert c.datos_registrales.startswith("T 12345 , F 10, S 8, H M 123456")
+
+
+def test_domicilio_stops_before_capital_suscrito():
+    c = _parse_text(SAMPLE)[1]
+    assert c.domicilio == "PLAZA 1 (BILBAO)"
+    assert c.capital == 1000000.0
+    assert c.capital_moneda == "PTS"
+
+
+def test_extract_officers_across_lines_and_semicolons():
+    officers = _extract_officers(
+        "Presidente: SANCHEZ DIAZ LUIS.\nSecretario: FERNANDEZ LOPEZ MARIA. "
+        "Vicepresidente: ALONSO PEREZ JOSE;MARTIN GIL ROSA. Auditor: AUDITORES SL. "
+        "Datos registrales. T 1, F 2"
+    )
+    assert [(o.cargo, o.nombre) for o in officers] == [
+        ("Presidente", "SANCHEZ DIAZ LUIS"),
+        ("Secretario", "FERNANDEZ LOPEZ MARIA"),
+        ("Vicepresidente", "ALONSO PEREZ JOSE"),
+        ("Vicepresidente", "MARTIN GIL ROSA"),
+        ("Auditor", "AUDITORES SL"),
+    ]
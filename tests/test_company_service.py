@@ -0,0 +1,46 @@
+"""Tests for the DB company search path."""
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.db.models import Company
+from app.schemas.search import SearchFilters
+from app.services.company_service import _search_via_db
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_match_offset_pages(db_session):
+    base = date(2024, 1, 1)
+    db_session.add_all([
+        Company(
+            nombre=f"EMPRESA {i:02d} SL",
+            nombre_normalizado=f"EMPRESA {i:02d}",
+            fecha_primera_publicacion=base,
+            # Repeated dates: the id tiebreak must keep pages disjoint
+            fecha_ultima_publicacion=base + timedelta(days=i // 3),
+        )
+        for i in range(23)
+    ])
+    await db_session.commit()
+
+    first = await _search_via_db(SearchFilters(per_page=10), db_session)
+    assert first["total"] == 23
+    assert first["next_cursor"]
+
+    seen = [c.id for c in first["items"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = await _search_via_db(SearchFilters(per_page=10, cursor=cursor), db_session)
+        assert page["total"] is None
+        seen.extend(c.id for c in page["items"])
+        cursor = page["next_cursor"]
+
+    by_offset = []
+    for n in (1, 2, 3):
+        page = await _search_via_db(SearchFilters(per_page=10, page=n), db_session)
+        by_offset.extend(c.id for c in page["items"])
+
+    assert seen == by_offset
+    assert len(set(seen)) == 23
@@ -0,0 +1,42 @@
+"""Tests for storing parsed BORME companies."""
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db.models import Act, Company, Officer
+from app.services.borme_fetcher import BormePdfEntry
+from app.services.borme_parser import ParsedAct, ParsedCompany, ParsedOfficer
+from app.services.data_normalizer import normalize_company
+from app.services.ingestion_orchestrator import _store_company
+
+
+@pytest.mark.asyncio
+async def test_new_company_with_repeated_act_and_officer(db_session):
+    fecha = date(2024, 3, 1)
+    entry = BormePdfEntry(id="BORME-A-2024-42-28", titulo="MADRID", url_pdf="https://boe.es/x.pdf", provincia="Madrid")
+    officer = ParsedOfficer(nombre="GARCIA LOPEZ JUAN", cargo="Adm. Unico")
+    parsed = ParsedCompany(
+        numero=1,
+        nombre="EJEMPLO SL",
+        actos=[
+            ParsedAct(tipo="Nombramientos", texto="Adm. Unico: GARCIA LOPEZ JUAN.", officers=[officer]),
+            # Same act repeated in the block, and the same officer under
+            # another act type that also maps to "nombramiento"
+            ParsedAct(tipo="Nombramientos", texto="Adm. Unico: GARCIA LOPEZ JUAN.", officers=[officer]),
+            ParsedAct(tipo="Otros conceptos", texto="Adm. Unico: GARCIA LOPEZ JUAN.", officers=[officer]),
+        ],
+    )
+    normalized = normalize_company(parsed, entry.provincia, fecha)
+
+    async with db_session.begin_nested():
+        result = await _store_company(db_session, parsed, entry, fecha, normalized, {})
+    await db_session.commit()
+
+    assert result["new"] == 1
+    assert result["acts"] == 2
+    assert await db_session.scalar(select(func.count(Company.id))) == 1
+    assert await db_session.scalar(select(func.count(Act.id))) == 2
+    assert await db_session.scalar(select(func.count(Officer.id))) == 1